@@ -0,0 +1,54 @@
+"""Add user search indexes for admin pagination.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+Adds:
+- ix_users_created_id: (created_at DESC, id DESC), matching the ORDER BY of
+  admin user search so the unfiltered listing, OFFSET or keyset
+  ((created_at, id) < cursor), is served by an index scan
+- ix_users_tier_active_created: (subscription_tier, is_active, created_at DESC),
+  for listings filtered by both plan and status; with only one of those
+  filters the planner falls back to ix_users_created_id plus a filter
+
+Email search uses ILIKE '%term%', which a btree cannot serve. On PostgreSQL a
+trigram index covers it once the pg_trgm extension is available:
+
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX ix_users_email_trgm ON users USING gin (email gin_trgm_ops);
+
+It is left out here because creating the extension needs elevated privileges.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the user search indexes."""
+    op.create_index(
+        "ix_users_created_id",
+        "users",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_users_tier_active_created",
+        "users",
+        ["subscription_tier", "is_active", sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Drop the user search indexes."""
+    op.drop_index("ix_users_tier_active_created", table_name="users")
+    op.drop_index("ix_users_created_id", table_name="users")
@@ -14,6 +14,7 @@ from fastapi.middleware.gzip import GZipMiddleware
 from codestory.core.config import get_settings
 from codestory.models.database import init_db, close_db
 from codestory.tools import create_codestory_server
+from codestory.tools.voice import close_client as close_voice_client
 from codestory.api.config.openapi import TAGS_METADATA, custom_openapi
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     Shutdown:
     - Close database connections
+    - Close the shared ElevenLabs HTTP client
     """
     settings = get_settings()
 
@@ -54,6 +56,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Shutting down...")
     await close_db()
     logger.info("Database connections closed")
+    await close_voice_client()
 
 
 def create_app() -> FastAPI:
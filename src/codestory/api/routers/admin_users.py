@@ -9,6 +9,7 @@ Provides endpoints for admin user management:
 - Manage user API keys
 """
 
+from datetime import datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
@@ -39,6 +40,13 @@ class UserListItem(BaseModel):
     created_at: str | None
 
 
+class UserListCursor(BaseModel):
+    """Keyset position of the last user on a page."""
+
+    created_at: str
+    id: int
+
+
 class UserListResponse(BaseModel):
     """Paginated user list."""
 
@@ -47,6 +55,7 @@ class UserListResponse(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    next_cursor: UserListCursor | None = None
 
 
 class UserStats(BaseModel):
@@ -173,6 +182,12 @@ async def list_users(
     plan: str | None = Query(None, pattern="^(free|pro|enterprise)$"),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor_created_at: Annotated[
+        datetime | None, Query(description="next_cursor.created_at from the previous page")
+    ] = None,
+    cursor_id: Annotated[
+        int | None, Query(description="next_cursor.id from the previous page")
+    ] = None,
 ) -> UserListResponse:
     """List and search users with pagination.
 
@@ -185,10 +200,21 @@ async def list_users(
         plan: Filter by subscription tier
         page: Page number
         per_page: Results per page
+        cursor_created_at: Keyset cursor timestamp; when set, page is ignored
+        cursor_id: Keyset cursor user ID, required with cursor_created_at
 
     Returns:
         Paginated user list
     """
+    if (cursor_created_at is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor_created_at and cursor_id must be given together",
+        )
+    cursor = None
+    if cursor_created_at is not None and cursor_id is not None:
+        cursor = (cursor_created_at, cursor_id)
+
     service = UserManagementService(db)
     result = await service.search_users(
         search=search,
@@ -196,6 +222,7 @@ async def list_users(
         plan=plan,
         page=page,
         per_page=per_page,
+        cursor=cursor,
     )
 
     # Audit log
@@ -210,6 +237,7 @@ async def list_users(
             "status": user_status,
             "plan": plan,
             "page": page,
+            "cursor": {"created_at": cursor[0].isoformat(), "id": cursor[1]} if cursor else None,
             "result_count": len(result["users"]),
         },
         ip_address=request.client.host if request.client else None,
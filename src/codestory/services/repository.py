@@ -94,7 +94,7 @@ class RepositoryService:
     @staticmethod
     def _hash_url(url: str) -> str:
         """Create a short hash of a URL for caching keys."""
-        return hashlib.sha256(url.encode()).hexdigest()[:16]
+        return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
 
     @staticmethod
     def parse_github_url(url: str) -> tuple[str, str] | None:
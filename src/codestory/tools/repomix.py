@@ -14,32 +14,200 @@ All Repomix outputs are saved as artifacts that subsequent agents
 """
 
 import asyncio
+import contextlib
 import hashlib
+import heapq
+import io
 import json
+import mmap
 import os
 import re
+import shutil
+import statistics
+import sys
 import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Any, cast
 from urllib.parse import urlparse
 
+import aiofiles
+import orjson
 from claude_agent_sdk import tool
 
 # Artifact storage directory (relative to project root or configurable)
 ARTIFACT_DIR = os.environ.get("CODESTORY_ARTIFACT_DIR", "/tmp/codestory_artifacts")
 
+# Run repomix under `nice` on POSIX systems that provide it
+_NICE_PREFIX = ("nice", "-n", "10") if os.name == "posix" and shutil.which("nice") else ()
+
+# Artifacts at least this large are read through _read_large_file on Linux
+_LARGE_ARTIFACT_BYTES = 8 << 20
+_LARGE_READ_CHUNK = 16 << 20
+
+# Characters read per step when scanning an artifact for one file
+_STREAM_CHUNK_CHARS = 1 << 20
+
+# Characters after a file header searched before falling back to the full artifact
+_FILE_WINDOW_CHARS = 4 << 20
+
+# Maximum number of repomix subprocesses running at once; callers may
+# asyncio.gather several package_repository calls and let this bound them
+_REPOMIX_SEMAPHORE = asyncio.Semaphore(int(os.environ.get("CODESTORY_REPOMIX_CONCURRENCY", "4")))
+
+# File headers emitted by repomix (markdown "## File:" / legacy "# File:" / XML)
+_FILE_HEADER_RE = re.compile(rb"^## File:|^# File:|^<file path=", re.MULTILINE)
+
+# Same headers as text, capturing the file path for the offset index
+_FILE_PATH_HEADER_RE = re.compile(
+    r'^(?:## File: |# File: )(?P<md>[^\n]+)$|^<file path="(?P<xml>[^"]+)"', re.MULTILINE
+)
+
+# Entry point file names, matched as whole path segments in a single pass
+_ENTRY_POINT_RE = re.compile(
+    r"(?:^|/)(?:main|app|server|manage|run|wsgi|asgi)\.py$"
+    r"|(?:^|/)index\.(?:ts|tsx|js|jsx|mjs)$"
+    r"|(?:^|/)src/(?:main|index|app)\.",
+    re.IGNORECASE,
+)
+
+# Top-level directory names that signal an architectural pattern
+_MVC_DIRS = frozenset({"models", "views", "controllers", "model", "view", "controller"})
+_CLEAN_ARCHITECTURE_DIRS = frozenset({"domain", "application", "infrastructure"})
+_LAYERED_DIRS = frozenset({"services", "repositories", "entities"})
+_API_DIRS = frozenset({"routes", "routers", "api", "endpoints"})
+_COMPONENT_DIRS = frozenset({"components", "pages", "layouts"})
+_MONOREPO_DIRS = frozenset({"packages", "apps", "libs"})
+
+# File suffixes that make an ecosystem's framework indicators worth scanning for
+_ECOSYSTEM_SUFFIXES = {
+    "python": frozenset({".py", ".pyi"}),
+    "javascript": frozenset({".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".vue"}),
+}
+
+# Framework indicators in report order: (framework, ecosystem, compiled indicators)
+_FRAMEWORK_INDICATORS = [
+    (framework, ecosystem, re.compile("|".join(patterns)))
+    for framework, ecosystem, patterns in [
+        ("FastAPI", "python", [r"from fastapi import", r"FastAPI\(\)"]),
+        ("Django", "python", [r"from django", r"django\.conf", r"manage\.py.*django"]),
+        ("Flask", "python", [r"from flask import", r"Flask\(__name__\)"]),
+        ("Express", "javascript", [r"require\(['\"]express['\"]", r"import express"]),
+        ("React", "javascript", [r"from ['\"]react['\"]", r"import React", r"useState", r"useEffect"]),
+        ("Next.js", "javascript", [r"from ['\"]next", r"getServerSideProps", r"getStaticProps"]),
+        ("Vue", "javascript", [r"from ['\"]vue['\"]", r"createApp", r"defineComponent"]),
+        ("NestJS", "javascript", [r"@nestjs/", r"@Module\(", r"@Controller\("]),
+        ("SQLAlchemy", "python", [r"from sqlalchemy", r"declarative_base", r"Column\("]),
+        ("Prisma", "javascript", [r"@prisma/client", r"PrismaClient"]),
+        ("pytest", "python", [r"import pytest", r"@pytest\."]),
+        ("Jest", "javascript", [r"describe\(", r"it\(", r"expect\("]),
+    ]
+]
+
+# Top-level source roots whose children are reported as core modules
+_CORE_PREFIXES = ("src/", "lib/", "core/", "app/", "pkg/")
+
+# Directories already created by this process (see _ensure_dir)
+_CREATED_DIRS: set[str] = set()
+
+# Median stat latency above which artifact listings stat files in parallel;
+# whether the artifact filesystem is that slow is probed once (see
+# _stat_is_slow) unless CODESTORY_SLOW_STAT is set to 1 or 0
+_SLOW_STAT_SECONDS = 0.001
+_SLOW_STAT_SAMPLES = 5
+_SLOW_STAT: bool | None = (
+    None if os.environ.get("CODESTORY_SLOW_STAT") is None
+    else os.environ["CODESTORY_SLOW_STAT"] == "1"
+)
+
+# Resolved packaged_repository paths by GitHub URL, least recently used first
+_PACKAGED_PATHS: OrderedDict[str, str] = OrderedDict()
+_PACKAGED_PATHS_MAX = 1024
+
+# (content, file index) of recently read packaged artifacts by
+# (path, mtime_ns, size), least recently used first (see _packaged_index),
+# holding at most _PACKAGED_INDEXES_BYTES of artifacts (by file size). It is
+# filled from worker threads, so changes are made under _PACKAGED_INDEXES_LOCK
+_PACKAGED_INDEXES: OrderedDict[tuple[str, int, int], tuple[str, dict[str, tuple[int, int]]]] = OrderedDict()
+_PACKAGED_INDEXES_BYTES = int(os.environ.get("CODESTORY_INDEX_CACHE_BYTES", str(128 << 20)))
+_PACKAGED_INDEXES_LOCK = threading.Lock()
+_packaged_indexes_bytes = 0
+
+# How long a packaged repository is reused before repomix runs again (seconds)
+PACKAGE_CACHE_TTL = int(os.environ.get("CODESTORY_PACKAGE_CACHE_TTL", "3600"))
+
+# Content-addressed packages (see _cache_key) kept per repository, newest
+# first; they are internal and left out of artifact listings
+PACKAGE_CACHE_KEEP = int(os.environ.get("CODESTORY_PACKAGE_CACHE_KEEP", "4"))
+_CACHED_PACKAGE_RE = re.compile(r"packaged_[0-9a-f]{32}\.(?:md|xml|json)")
+
+
+@dataclass(slots=True)
+class ChapterComponent:
+    """Chapter skeleton produced by identify_story_components."""
+
+    number: int
+    title: str
+    focus: str
+    narrative_hook: str
+    learning_goals: list[str]
+    key_files: list[str] | None = None
+    patterns: list[str] | None = None
+    frameworks: list[str] | None = None
+    modules: list[str] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dict for JSON serialization, omitting unset focus details."""
+        data: dict[str, Any] = {
+            "number": self.number,
+            "title": self.title,
+            "focus": self.focus,
+        }
+        for key in ("key_files", "patterns", "frameworks", "modules"):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        data["narrative_hook"] = self.narrative_hook
+        data["learning_goals"] = self.learning_goals
+        return data
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response payload to JSON text."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _ensure_dir(path: str, *, recreate: bool = False) -> str:
+    """Create a directory once per process; later calls skip the mkdir syscall.
+
+    Writers pass recreate=True after a FileNotFoundError, since the directory
+    may have been deleted (e.g. by tmp cleanup) since it was first created.
+    """
+    if recreate or path not in _CREATED_DIRS:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        _CREATED_DIRS.add(path)
+    return path
+
 
 def _ensure_artifact_dir():
     """Ensure artifact directory exists."""
-    Path(ARTIFACT_DIR).mkdir(parents=True, exist_ok=True)
-    return ARTIFACT_DIR
+    return _ensure_dir(ARTIFACT_DIR)
 
 
+@lru_cache(maxsize=256)
 def _hash_url(url: str) -> str:
     """Create a short hash of a URL for caching keys."""
-    return hashlib.sha256(url.encode()).hexdigest()[:16]
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
 
 
+@lru_cache(maxsize=256)
 def _parse_github_url(url: str) -> tuple[str, str] | None:
     """Extract owner/repo from GitHub URL."""
     parsed = urlparse(url)
@@ -49,22 +217,445 @@ def _parse_github_url(url: str) -> tuple[str, str] | None:
     return None
 
 
-def _get_artifact_path(github_url: str, artifact_type: str, ext: str = "json") -> str:
+def _directory_prefixes(path: str) -> Iterator[str]:
+    """Yield every parent directory of a packaged file path ("a/b/c" -> "a", "a/b")."""
+    i = path.find("/")
+    while i != -1:
+        yield path[:i]
+        i = path.find("/", i + 1)
+
+
+def _file_suffix(path: str) -> str:
+    """Return the extension of a packaged file path, matching PurePath.suffix."""
+    dot = path.rfind(".")
+    slash = path.rfind("/")
+    if dot > slash + 1 and dot < len(path) - 1:
+        return path[dot:]
+    return ""
+
+
+def _files_with_main_guard(packaged_content: str) -> list[str]:
+    """Return packaged files whose body contains an `if __name__` guard.
+
+    Walks the guards with str.find and attributes each one to the nearest
+    preceding "# File: " header, so the scan stays linear in content size.
+    """
+    files = []
+    pos = packaged_content.find("if __name__")
+    while pos != -1:
+        header = packaged_content.rfind("# File: ", 0, pos)
+        if header != -1:
+            name_start = header + len("# File: ")
+            name_end = packaged_content.find("\n", name_start)
+            files.append(packaged_content[name_start:name_end])
+
+        # Continue from the next file so each file is reported once
+        next_header = packaged_content.find("# File: ", pos)
+        if next_header == -1:
+            break
+        pos = packaged_content.find("if __name__", next_header)
+    return files
+
+
+@lru_cache(maxsize=1024)
+def _file_patterns(
+    file_path: str, packaged_format: str | None = None
+) -> tuple[tuple[str, re.Pattern[str], bool], ...]:
+    """Compile the extraction patterns for one file, in the order they are tried.
+
+    Each entry is (anchor, pattern, strip): anchor is the literal header every
+    match starts with, and strip marks the unfenced fallback, whose captured
+    body is whitespace-trimmed. packaged_format ("md" or "xml") keeps only the
+    patterns for that output style; None keeps them all.
+    """
+    esc = re.escape(file_path)
+    md_header = f"## File: {file_path}\n"
+    patterns = (
+        # Markdown: ## File: path\n````lang\ncontent\n```` (Repomix uses 4 backticks)
+        ("md", md_header, re.compile(rf"## File: {esc}\n````[^\n]*\n(.*?)````", re.DOTALL), False),
+        # Markdown with 3 backticks as fallback
+        ("md", md_header, re.compile(rf"## File: {esc}\n```[^\n]*\n(.*?)```", re.DOTALL), False),
+        # Single # File: format
+        ("md", f"# File: {file_path}\n", re.compile(rf"# File: {esc}\n```[^\n]*\n(.*?)```", re.DOTALL), False),
+        # XML: <file path="path"><content>...</content></file>
+        ("xml", f'<file path="{file_path}"', re.compile(rf'<file path="{esc}"[^>]*>\s*<content>(.*?)</content>', re.DOTALL), False),
+        # Simpler markdown format without fences
+        ("md", md_header, re.compile(rf"## File: {esc}\n(.*?)(?=\n## File:|$)", re.DOTALL), True),
+    )
+    return tuple(
+        (anchor, pattern, strip)
+        for fmt, anchor, pattern, strip in patterns
+        if packaged_format is None or fmt == packaged_format
+    )
+
+
+def _search_from_anchor(packaged_content: str, anchor: str, pattern: re.Pattern[str]) -> re.Match[str] | None:
+    """Match pattern starting at the first occurrence of its literal anchor.
+
+    The regex only scans a window after the header; it falls back to the rest
+    of the content when the match would run past the window.
+    """
+    start = packaged_content.find(anchor)
+    if start == -1:
+        return None
+    end = start + _FILE_WINDOW_CHARS
+    if end < len(packaged_content):
+        match = pattern.search(packaged_content, start, end)
+        # A match touching the window edge may have been cut short (or hit "$")
+        if match and match.end() < end:
+            return match
+    return pattern.search(packaged_content, start)
+
+
+def _get_artifact_path(
+    github_url: str, artifact_type: str, ext: str = "json", *, create: bool = True
+) -> str:
     """Generate consistent artifact path for a repository.
 
     Artifacts are stored as:
     {ARTIFACT_DIR}/{owner}_{repo}/{artifact_type}.{ext}
+
+    The repository directory is created unless create is False, which
+    lookups pass so probing for an artifact leaves no empty directory behind.
     """
     parsed = _parse_github_url(github_url)
     if not parsed:
-        return os.path.join(ARTIFACT_DIR, f"unknown_{_hash_url(github_url)}", f"{artifact_type}.{ext}")
+        repo_dir = os.path.join(ARTIFACT_DIR, f"unknown_{_hash_url(github_url)}")
+    else:
+        owner, repo = parsed
+        repo_dir = os.path.join(ARTIFACT_DIR, f"{owner}_{repo}")
 
-    owner, repo = parsed
-    repo_dir = os.path.join(ARTIFACT_DIR, f"{owner}_{repo}")
-    Path(repo_dir).mkdir(parents=True, exist_ok=True)
+    if create:
+        _ensure_dir(repo_dir)
     return os.path.join(repo_dir, f"{artifact_type}.{ext}")
 
 
+def _resolve_packaged_path(github_url: str) -> str | None:
+    """Find the packaged repository artifact for a URL, whatever its format.
+
+    A remembered path costs one existence check instead of probing every
+    extension; it is forgotten when the file disappears or is re-packaged.
+    """
+    path = _PACKAGED_PATHS.get(github_url)
+    if path is not None:
+        if os.path.exists(path):
+            _PACKAGED_PATHS.move_to_end(github_url)
+            return path
+        del _PACKAGED_PATHS[github_url]
+
+    for ext in ("md", "xml", "json"):
+        path = _get_artifact_path(github_url, "packaged_repository", ext, create=False)
+        if os.path.exists(path):
+            _PACKAGED_PATHS[github_url] = path
+            if len(_PACKAGED_PATHS) > _PACKAGED_PATHS_MAX:
+                _PACKAGED_PATHS.popitem(last=False)
+            return path
+    return None
+
+
+def _cache_key(
+    github_url: str,
+    output_format: str,
+    include_patterns: list[str],
+    exclude_patterns: list[str],
+    remove_comments: bool,
+    compress: bool,
+) -> str:
+    """Create a content-addressed key for a packaging request."""
+    canonical = json.dumps(
+        [
+            github_url,
+            output_format,
+            sorted(include_patterns or []),
+            sorted(exclude_patterns or []),
+            bool(remove_comments),
+            bool(compress),
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _is_fresh_artifact(path: str) -> bool:
+    """Check whether a cached artifact exists and is younger than the cache TTL."""
+    try:
+        return time.time() - os.stat(path).st_mtime < PACKAGE_CACHE_TTL
+    except FileNotFoundError:
+        return False
+
+
+def _prune_cached_packages(repo_dir: str, current: str) -> None:
+    """Delete all but the newest PACKAGE_CACHE_KEEP cached packages of a repository."""
+    with os.scandir(repo_dir) as it:
+        cached = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in it
+            if _CACHED_PACKAGE_RE.fullmatch(entry.name) and entry.path != current
+        ]
+    cached.sort(reverse=True)
+    # The package just used counts towards the limit
+    for _, path in cached[max(PACKAGE_CACHE_KEEP - 1, 0):]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def _create_temp_output(directory: str, prefix: str, suffix: str) -> str:
+    """Create an empty file for repomix to write into and return its path."""
+    try:
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=directory)
+    except FileNotFoundError:
+        directory = _ensure_dir(directory, recreate=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=directory)
+    os.close(fd)
+    return path
+
+
+def _link_artifact(source: str, link_path: str) -> None:
+    """Expose a cached artifact under its canonical name without copying it."""
+    if os.path.exists(link_path) and os.path.samefile(source, link_path):
+        return
+
+    staging = f"{link_path}.{os.getpid()}.tmp"
+    try:
+        os.link(source, staging)
+    except OSError:
+        # Filesystem without hard links - fall back to a plain copy
+        shutil.copyfile(source, staging)
+    os.replace(staging, link_path)
+
+
+def _packaged_statistics(path: str) -> tuple[int, int]:
+    """Count file headers and bytes of a packaged repository without decoding it.
+
+    The artifact is memory-mapped and scanned with a bytes pattern, so no
+    str copy of the (potentially very large) content is ever built.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            file_count = sum(1 for _ in _FILE_HEADER_RE.finditer(mm))
+    return file_count, size
+
+
+def _read_large_file(path: str) -> str:
+    """Read a large artifact with sequential readahead into one preallocated buffer."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        buf = bytearray(size)
+        view = memoryview(buf)
+        offset = 0
+        while offset < size:
+            read = os.readv(fd, [view[offset:offset + _LARGE_READ_CHUNK]])
+            if read == 0:
+                break
+            offset += read
+        del view
+    finally:
+        os.close(fd)
+
+    # Match text-mode reads, which translate \r\n and \r to \n
+    text = buf[:offset].decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+async def _read_artifact_text(path: str) -> str:
+    """Read an artifact without blocking the event loop.
+
+    Large artifacts on Linux are read in big chunks on a worker thread;
+    everything else goes through aiofiles.
+    """
+    if sys.platform == "linux" and os.path.getsize(path) >= _LARGE_ARTIFACT_BYTES:
+        return await asyncio.to_thread(_read_large_file, path)
+
+    async with aiofiles.open(path, encoding="utf-8") as f:
+        return cast(str, await f.read())
+
+
+def _packaged_index(path: str, mtime_ns: int, size: int) -> tuple[str, dict[str, tuple[int, int]]]:
+    """Read a packaged repository once and index each file's (start, end) span.
+
+    Spans run from a file's header to the next header (or EOF); the first
+    header wins for duplicate paths. Results are kept in _PACKAGED_INDEXES
+    unless the artifact alone exceeds _PACKAGED_INDEXES_BYTES; mtime_ns and
+    size are part of the key so a re-packaged artifact is re-indexed.
+    """
+    global _packaged_indexes_bytes
+    key = (path, mtime_ns, size)
+    with _PACKAGED_INDEXES_LOCK:
+        cached = _PACKAGED_INDEXES.get(key)
+        if cached is not None:
+            _PACKAGED_INDEXES.move_to_end(key)
+            return cached
+
+    # Read and index outside the lock; concurrent misses on the same artifact
+    # may both do the work, and the first result is kept
+    if sys.platform == "linux":
+        text = _read_large_file(path)
+    else:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+
+    index: dict[str, tuple[int, int]] = {}
+    previous: str | None = None
+    previous_start = 0
+    for match in _FILE_PATH_HEADER_RE.finditer(text):
+        if previous is not None:
+            index.setdefault(previous, (previous_start, match.start()))
+        previous = match.group("md") or match.group("xml")
+        previous_start = match.start()
+    if previous is not None:
+        index.setdefault(previous, (previous_start, len(text)))
+    cached = (text, index)
+
+    if size > _PACKAGED_INDEXES_BYTES:
+        return cached
+    with _PACKAGED_INDEXES_LOCK:
+        if key in _PACKAGED_INDEXES:
+            _PACKAGED_INDEXES.move_to_end(key)
+            return _PACKAGED_INDEXES[key]
+        _PACKAGED_INDEXES[key] = cached
+        _packaged_indexes_bytes += size
+        while _packaged_indexes_bytes > _PACKAGED_INDEXES_BYTES:
+            (_, _, evicted_size), _ = _PACKAGED_INDEXES.popitem(last=False)
+            _packaged_indexes_bytes -= evicted_size
+    return cached
+
+
+@lru_cache(maxsize=8)
+def _packaged_json_files(path: str, mtime_ns: int, size: int) -> dict[str, str] | None:
+    """Parse a JSON-style package once and return its {path: content} files map.
+
+    Returns None when the artifact is not a repomix JSON package.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = orjson.loads(f.read())
+        except orjson.JSONDecodeError:
+            return None
+    files = data.get("files") if isinstance(data, dict) else None
+    return files if isinstance(files, dict) else None
+
+
+async def _load_packaged_json_files(path: str) -> dict[str, str] | None:
+    """Return the cached files map of a JSON package, parsing it off-loop."""
+    st = os.stat(path)
+    return await asyncio.to_thread(_packaged_json_files, path, st.st_mtime_ns, st.st_size)
+
+
+async def _load_packaged_index(path: str) -> tuple[str, dict[str, tuple[int, int]]]:
+    """Return the cached (content, index) for a packaged artifact, building it off-loop."""
+    st = os.stat(path)
+    return await asyncio.to_thread(_packaged_index, path, st.st_mtime_ns, st.st_size)
+
+
+def _stream_fenced_file(path: str, file_path: str) -> str | None:
+    """Scan a markdown artifact in chunks and return one file's fenced body.
+
+    Reading stops at the file's closing fence, so the rest of the package is
+    never loaded. Returns None whenever the section is not a simple
+    "## File:" header line followed by a fenced block (missing header, no
+    fence, empty body, EOF), so the caller can fall back to the indexed
+    search.
+    """
+    # A leading newline lets a header on the first line match as a whole line
+    needle = f"\n## File: {file_path}\n"
+    with open(path, encoding="utf-8") as f:
+        buffer = "\n"
+        while (pos := buffer.find(needle)) == -1:
+            chunk = f.read(_STREAM_CHUNK_CHARS)
+            if not chunk:
+                return None
+            buffer = buffer[-(len(needle) - 1):] + chunk
+        buffer = buffer[pos + len(needle):]
+
+        while (eol := buffer.find("\n")) == -1:
+            chunk = f.read(_STREAM_CHUNK_CHARS)
+            if not chunk:
+                return None
+            buffer += chunk
+        if not buffer.startswith("```"):
+            return None
+        fence = "````" if buffer.startswith("````") else "```"
+
+        # The body ends at the first fence occurrence, as the lazy regex does
+        body = buffer[eol + 1:]
+        start = 0
+        while (cut := body.find(fence, start)) == -1:
+            chunk = f.read(_STREAM_CHUNK_CHARS)
+            if not chunk:
+                return None
+            start = max(0, len(body) - len(fence) + 1)
+            body += chunk
+    return body[:cut] or None
+
+
+def _artifact_entry(name: str, path: str, stat: os.stat_result) -> dict[str, Any]:
+    """Describe one artifact file for list_available_artifacts."""
+    return {
+        "name": name,
+        "path": path,
+        "size_bytes": stat.st_size,
+        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+    }
+
+
+def _scan_artifacts(repo_dir: str) -> list[dict[str, Any]]:
+    """Describe every artifact except cached packages in one scandir pass."""
+    with os.scandir(repo_dir) as it:
+        return [
+            _artifact_entry(entry.name, entry.path, entry.stat())
+            for entry in it
+            if not _CACHED_PACKAGE_RE.fullmatch(entry.name)
+        ]
+
+
+def _stat_is_slow(path: str) -> bool:
+    """Probe once per process whether stat on the artifact filesystem is slow (e.g. NFS).
+
+    Uses the median of several timings so one stall (GIL contention, a cold
+    cache) does not decide the listing strategy for the whole process.
+    """
+    global _SLOW_STAT
+    if _SLOW_STAT is None:
+        timings = []
+        for _ in range(_SLOW_STAT_SAMPLES):
+            start = time.perf_counter()
+            os.stat(path)
+            timings.append(time.perf_counter() - start)
+        _SLOW_STAT = statistics.median(timings) > _SLOW_STAT_SECONDS
+    return _SLOW_STAT
+
+
+async def _list_artifacts(repo_dir: str) -> list[dict[str, Any]]:
+    """Describe the artifacts in a repository directory off the event loop.
+
+    Local filesystems use a single scandir pass; when stat is slow the
+    per-file stats are fanned out across the thread pool instead.
+    """
+    if not await asyncio.to_thread(_stat_is_slow, repo_dir):
+        return await asyncio.to_thread(_scan_artifacts, repo_dir)
+
+    names = [
+        name
+        for name in await asyncio.to_thread(os.listdir, repo_dir)
+        if not _CACHED_PACKAGE_RE.fullmatch(name)
+    ]
+    paths = [os.path.join(repo_dir, name) for name in names]
+    stats = await asyncio.gather(*(asyncio.to_thread(os.stat, path) for path in paths))
+    return [
+        _artifact_entry(name, path, stat)
+        for name, path, stat in zip(names, paths, stats, strict=True)
+    ]
+
+
 def _save_artifact(github_url: str, artifact_type: str, content: str | dict, ext: str = "json") -> str:
     """Save an artifact and return its path.
 
@@ -76,11 +667,19 @@ def _save_artifact(github_url: str, artifact_type: str, content: str | dict, ext
     _ensure_artifact_dir()
     path = _get_artifact_path(github_url, artifact_type, ext)
 
-    if isinstance(content, dict):
-        content = json.dumps(content, indent=2)
+    data = (
+        orjson.dumps(content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        if isinstance(content, dict)
+        else content.encode("utf-8")
+    )
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+    except FileNotFoundError:
+        _ensure_dir(os.path.dirname(path), recreate=True)
+        with open(path, "wb") as f:
+            f.write(data)
 
     return path
 
@@ -88,7 +687,7 @@ def _save_artifact(github_url: str, artifact_type: str, content: str | dict, ext
 @tool(
     name="package_repository",
     description="Package a GitHub repository using Repomix CLI into an AI-friendly format. "
-    "Returns the packaged content with token count and file statistics. "
+    "Returns the artifact path with token count and file statistics. "
     "This is the primary tool for repository analysis - use it FIRST before any analysis.",
     input_schema={
         "github_url": "GitHub repository URL (e.g., https://github.com/owner/repo)",
@@ -96,6 +695,10 @@ def _save_artifact(github_url: str, artifact_type: str, content: str | dict, ext
         "include_patterns": "Optional list of glob patterns to include (e.g., ['src/**', '*.py'])",
         "exclude_patterns": "Optional list of patterns to exclude (e.g., ['*.test.*', 'node_modules/**'])",
         "remove_comments": "Whether to remove code comments for smaller output (default: false)",
+        "compress": "Whether to let Repomix compress code to signatures for smaller output; "
+        "function bodies are dropped (default: false)",
+        "include_content": "Whether to embed the packaged content and repomix output in the response "
+        "(default: false - pass artifact_path to later tools instead)",
     },
 )
 async def package_repository(args: dict) -> dict:
@@ -110,12 +713,14 @@ async def package_repository(args: dict) -> dict:
     include_patterns = args.get("include_patterns", [])
     exclude_patterns = args.get("exclude_patterns", [])
     remove_comments = args.get("remove_comments", False)
+    compress = args.get("compress", False)
+    include_content = args.get("include_content", False)
 
     # Validate GitHub URL
     parsed = _parse_github_url(github_url)
     if not parsed:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "Invalid GitHub URL. Expected format: https://github.com/owner/repo",
                 "url": github_url
             })}],
@@ -124,110 +729,141 @@ async def package_repository(args: dict) -> dict:
 
     owner, repo = parsed
 
-    # Create temp file for output
     ext_map = {"markdown": "md", "xml": "xml", "json": "json"}
     ext = ext_map.get(output_format, "md")
-    temp_output = tempfile.mktemp(suffix=f".{ext}", prefix=f"repomix_{_hash_url(github_url)}_")
-
-    # Build repomix command
-    cmd = [
-        "npx", "repomix",
-        "--remote", f"{owner}/{repo}",
-        "--style", output_format,
-        "-o", temp_output,
-    ]
-
-    # Add include patterns
-    if include_patterns:
-        cmd.extend(["--include", ",".join(include_patterns)])
 
-    # Add exclude patterns
-    if exclude_patterns:
-        cmd.extend(["-i", ",".join(exclude_patterns)])
-
-    # Add comment removal flag
-    if remove_comments:
-        cmd.append("--remove-comments")
+    # Identical packaging requests share a content-addressed artifact, so a
+    # fresh one lets us skip the repomix subprocess entirely
+    cache_key = _cache_key(
+        github_url, output_format, include_patterns, exclude_patterns, remove_comments, compress
+    )
+    cached_path = _get_artifact_path(github_url, f"packaged_{cache_key}", ext)
+    artifact_path = _get_artifact_path(github_url, "packaged_repository", ext)
+    temp_output = None
+    stdout = None
 
     try:
-        # Execute repomix
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(),
-            timeout=300  # 5 minute timeout for large repos
-        )
-
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "Unknown error"
-            return {
-                "content": [{"type": "text", "text": json.dumps({
-                    "error": f"Repomix failed: {error_msg}",
-                    "command": " ".join(cmd),
-                    "return_code": process.returncode
-                })}],
-                "isError": True,
-            }
-
-        # Read packaged content
-        if not os.path.exists(temp_output):
-            return {
-                "content": [{"type": "text", "text": json.dumps({
-                    "error": "Repomix did not produce output file",
-                    "expected_path": temp_output
-                })}],
-                "isError": True,
-            }
+        cache_hit = _is_fresh_artifact(cached_path)
+        if not cache_hit:
+            # Repomix writes straight into the artifact directory; the temp file is
+            # renamed onto the cached path on success so content is written once
+            temp_output = _create_temp_output(
+                os.path.dirname(cached_path), f"repomix_{_hash_url(github_url)}_", f".{ext}"
+            )
+
+            # Build repomix command, at lower CPU priority where `nice` exists so
+            # the subprocess does not starve the agent's event loop
+            cmd = [
+                *_NICE_PREFIX,
+                "npx", "repomix",
+                "--remote", f"{owner}/{repo}",
+                "--style", output_format,
+                "-o", temp_output,
+            ]
+
+            # Add include patterns
+            if include_patterns:
+                cmd.extend(["--include", ",".join(include_patterns)])
+
+            # Add exclude patterns
+            if exclude_patterns:
+                cmd.extend(["-i", ",".join(exclude_patterns)])
+
+            # Add comment removal flag
+            if remove_comments:
+                cmd.append("--remove-comments")
+
+            # Compression keeps the ## File: headers the analysis tools rely on
+            if compress:
+                cmd.append("--compress")
+
+            # Under `nice` a missing npx would surface as exit code 127, so
+            # check for it here and report it as the CLI not being installed
+            if shutil.which("npx") is None:
+                raise FileNotFoundError("npx")
+
+            # Execute repomix (bounded so batch packaging overlaps without
+            # spawning an unbounded number of node processes)
+            async with _REPOMIX_SEMAPHORE:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=300  # 5 minute timeout for large repos
+                )
+
+            if process.returncode != 0:
+                error_msg = stderr.decode() if stderr else "Unknown error"
+                return {
+                    "content": [{"type": "text", "text": _dumps({
+                        "error": f"Repomix failed: {error_msg}",
+                        "command": " ".join(cmd),
+                        "return_code": process.returncode
+                    })}],
+                    "isError": True,
+                }
+
+            # Read packaged content
+            if not os.path.exists(temp_output) or os.path.getsize(temp_output) == 0:
+                return {
+                    "content": [{"type": "text", "text": _dumps({
+                        "error": "Repomix did not produce output file",
+                        "expected_path": temp_output
+                    })}],
+                    "isError": True,
+                }
+
+            os.replace(temp_output, cached_path)
 
-        with open(temp_output, "r", encoding="utf-8") as f:
-            packaged_content = f.read()
+        # SAVE ARTIFACT for later agents (Story Architect, Voice Director)
+        # This enables them to re-read code if they need more context
+        _link_artifact(cached_path, artifact_path)
+        _PACKAGED_PATHS.pop(github_url, None)
+        _prune_cached_packages(os.path.dirname(cached_path), cached_path)
 
-        # Extract statistics from repomix output (Repomix uses ## File: format)
-        file_count = len(re.findall(r"^## File:|^# File:|^<file path=", packaged_content, re.MULTILINE))
+        # Statistics come straight from the mapped artifact; character_count is
+        # the UTF-8 size, which matches the character count for ASCII sources
+        file_count, character_count = _packaged_statistics(artifact_path)
 
         # Estimate token count (rough: ~4 chars per token)
-        estimated_tokens = len(packaged_content) // 4
+        estimated_tokens = character_count // 4
 
         # Parse stdout for actual stats if available
         stdout_text = stdout.decode() if stdout else ""
 
-        # SAVE ARTIFACT for later agents (Story Architect, Voice Director)
-        # This enables them to re-read code if they need more context
-        artifact_path = _save_artifact(
-            github_url,
-            "packaged_repository",
-            packaged_content,
-            ext=ext
-        )
-
         result = {
             "success": True,
             "repository": f"{owner}/{repo}",
             "github_url": github_url,
             "output_format": output_format,
+            "cache_hit": cache_hit,
             "artifact_path": artifact_path,  # Persistent artifact for later agents
-            "packaged_content": packaged_content,
             "statistics": {
                 "file_count": file_count,
-                "character_count": len(packaged_content),
+                "character_count": character_count,
                 "estimated_tokens": estimated_tokens,
                 "within_context_limit": estimated_tokens < 150000,  # Claude's context limit
             },
-            "repomix_output": stdout_text[:1000] if stdout_text else None,
             "artifact_info": {
                 "path": artifact_path,
                 "note": "Later agents can use get_repository_artifact to re-read this content",
             }
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        # The artifact path is enough for later tools; only echo the (potentially
+        # very large) content when the caller explicitly asks for it
+        if include_content:
+            result["packaged_content"] = await _read_artifact_text(artifact_path)
+            result["repomix_output"] = stdout_text[:1000] if stdout_text else None
+
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except asyncio.TimeoutError:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "Repomix timed out after 5 minutes",
                 "repository": f"{owner}/{repo}"
             })}],
@@ -235,7 +871,7 @@ async def package_repository(args: dict) -> dict:
         }
     except FileNotFoundError:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "Repomix CLI not found. Install with: npm install -g repomix",
                 "install_command": "npm install -g repomix"
             })}],
@@ -243,15 +879,15 @@ async def package_repository(args: dict) -> dict:
         }
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Unexpected error: {str(e)}",
                 "type": type(e).__name__
             })}],
             "isError": True,
         }
     finally:
-        # Clean up temp file (artifact is saved separately)
-        if os.path.exists(temp_output):
+        # Clean up temp file left behind by a failed run (renamed away on success)
+        if temp_output and os.path.exists(temp_output):
             try:
                 os.remove(temp_output)
             except:
@@ -265,6 +901,7 @@ async def package_repository(args: dict) -> dict:
     "Use this AFTER package_repository to analyze the codebase.",
     input_schema={
         "packaged_content": "The packaged repository content from package_repository",
+        "artifact_path": "Alternatively, the artifact_path returned by package_repository",
         "focus_areas": "Optional list of areas to focus on (e.g., ['architecture', 'api', 'data'])",
     },
 )
@@ -278,17 +915,31 @@ async def analyze_packaged_repository(args: dict) -> dict:
     - Architectural patterns (MVC, layered, microservices, etc.)
     """
     packaged_content = args.get("packaged_content", "")
+    artifact_path = args.get("artifact_path", "")
     focus_areas = args.get("focus_areas", [])
 
-    if not packaged_content:
+    if not packaged_content and not artifact_path:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "No packaged content provided. Run package_repository first."
             })}],
             "isError": True,
         }
 
     try:
+        if not packaged_content:
+            # Only artifacts written by package_repository may be read back
+            artifact_root = os.path.realpath(ARTIFACT_DIR) + os.sep
+            if not os.path.realpath(artifact_path).startswith(artifact_root):
+                return {
+                    "content": [{"type": "text", "text": _dumps({
+                        "error": "artifact_path must point into the artifact directory",
+                        "artifact_path": artifact_path,
+                    })}],
+                    "isError": True,
+                }
+            packaged_content = await _read_artifact_text(artifact_path)
+
         # Extract file paths from packaged content
         # Supports both markdown (## File: path) and XML (<file path="path">) formats
         file_paths = []
@@ -307,60 +958,37 @@ async def analyze_packaged_repository(args: dict) -> dict:
         file_paths.extend(xml_files)
 
         # Build directory structure
-        directories = set()
-        for path in file_paths:
-            parts = Path(path).parts
-            for i in range(1, len(parts)):
-                directories.add("/".join(parts[:i]))
+        directories = {d for path in file_paths for d in _directory_prefixes(path)}
 
         # Identify entry points
-        entry_point_patterns = [
-            r"main\.py", r"app\.py", r"server\.py", r"index\.ts", r"index\.js",
-            r"manage\.py", r"run\.py", r"wsgi\.py", r"asgi\.py",
-            r"src/main\.", r"src/index\.", r"src/app\.",
-        ]
-        entry_points = []
-        for path in file_paths:
-            for pattern in entry_point_patterns:
-                if re.search(pattern, path, re.IGNORECASE):
-                    entry_points.append(path)
-                    break
-
-        # Also check for __main__ in content
-        if "__main__" in packaged_content:
-            main_matches = re.findall(r"# File: ([^\n]+)\n[^#]*if __name__", packaged_content)
-            entry_points.extend(main_matches)
-
-        entry_points = list(set(entry_points))
-
-        # Detect frameworks
-        framework_indicators = {
-            "FastAPI": [r"from fastapi import", r"FastAPI\(\)"],
-            "Django": [r"from django", r"django\.conf", r"manage\.py.*django"],
-            "Flask": [r"from flask import", r"Flask\(__name__\)"],
-            "Express": [r"require\(['\"]express['\"]", r"import express"],
-            "React": [r"from ['\"]react['\"]", r"import React", r"useState", r"useEffect"],
-            "Next.js": [r"from ['\"]next", r"getServerSideProps", r"getStaticProps"],
-            "Vue": [r"from ['\"]vue['\"]", r"createApp", r"defineComponent"],
-            "NestJS": [r"@nestjs/", r"@Module\(", r"@Controller\("],
-            "SQLAlchemy": [r"from sqlalchemy", r"declarative_base", r"Column\("],
-            "Prisma": [r"@prisma/client", r"PrismaClient"],
-            "pytest": [r"import pytest", r"@pytest\."],
-            "Jest": [r"describe\(", r"it\(", r"expect\("],
-        }
+        entry_points = [path for path in file_paths if _ENTRY_POINT_RE.search(path)]
 
-        detected_frameworks = []
-        for framework, patterns in framework_indicators.items():
-            for pattern in patterns:
-                if re.search(pattern, packaged_content):
-                    detected_frameworks.append(framework)
-                    break
+        # Fall back to files guarded by `if __name__` when no entry point file matched
+        if not entry_points and "__main__" in packaged_content:
+            entry_points.extend(_files_with_main_guard(packaged_content))
+
+        # Deduplicate preserving order - entry_points[0] is treated as the main file
+        entry_points = list(dict.fromkeys(entry_points))[:10]
 
         # Detect primary language
-        extensions = [Path(p).suffix for p in file_paths if Path(p).suffix]
-        ext_counts = {}
-        for ext in extensions:
-            ext_counts[ext] = ext_counts.get(ext, 0) + 1
+        ext_counts = Counter(filter(None, map(_file_suffix, file_paths)))
+
+        # Detect frameworks, skipping ecosystems with no files in the package
+        # (every indicator is a full scan of the packaged content)
+        if ext_counts:
+            present_ecosystems = {
+                ecosystem
+                for ecosystem, suffixes in _ECOSYSTEM_SUFFIXES.items()
+                if not suffixes.isdisjoint(ext_counts)
+            }
+        else:
+            present_ecosystems = set(_ECOSYSTEM_SUFFIXES)
+
+        detected_frameworks = [
+            framework
+            for framework, ecosystem, indicator in _FRAMEWORK_INDICATORS
+            if ecosystem in present_ecosystems and indicator.search(packaged_content)
+        ]
 
         language_map = {
             ".py": "Python",
@@ -377,45 +1005,41 @@ async def analyze_packaged_repository(args: dict) -> dict:
 
         primary_language = None
         if ext_counts:
-            top_ext = max(ext_counts, key=ext_counts.get)
+            top_ext = ext_counts.most_common(1)[0][0]
             primary_language = language_map.get(top_ext, top_ext)
 
         # Detect architectural patterns
         architectural_patterns = []
 
         # MVC pattern
-        if any(d in directories for d in ["models", "views", "controllers"]) or \
-           any(d in directories for d in ["model", "view", "controller"]):
+        if directories & _MVC_DIRS:
             architectural_patterns.append("MVC")
 
         # Layered architecture
-        if any(d in directories for d in ["domain", "application", "infrastructure"]):
+        if directories & _CLEAN_ARCHITECTURE_DIRS:
             architectural_patterns.append("Clean Architecture")
-        elif any(d in directories for d in ["services", "repositories", "entities"]):
+        elif directories & _LAYERED_DIRS:
             architectural_patterns.append("Layered Architecture")
 
         # API-centric
-        if any(d in directories for d in ["routes", "routers", "api", "endpoints"]):
+        if directories & _API_DIRS:
             architectural_patterns.append("REST API")
 
         # Component-based (frontend)
-        if any(d in directories for d in ["components", "pages", "layouts"]):
+        if directories & _COMPONENT_DIRS:
             architectural_patterns.append("Component-Based")
 
         # Monorepo
-        if any(d in directories for d in ["packages", "apps", "libs"]):
+        if directories & _MONOREPO_DIRS:
             architectural_patterns.append("Monorepo")
 
         # Identify core modules
         core_modules = []
-        core_patterns = ["src/", "lib/", "core/", "app/", "pkg/"]
         for path in file_paths:
-            for pattern in core_patterns:
-                if path.startswith(pattern):
-                    module = path.split("/")[1] if "/" in path else path
-                    if module not in core_modules and not module.startswith("."):
-                        core_modules.append(module)
-                    break
+            if path.startswith(_CORE_PREFIXES):
+                module = path.split("/", 2)[1]
+                if module not in core_modules and not module.startswith("."):
+                    core_modules.append(module)
 
         core_modules = core_modules[:20]  # Limit to top 20
 
@@ -423,10 +1047,10 @@ async def analyze_packaged_repository(args: dict) -> dict:
             "success": True,
             "structure": {
                 "total_files": len(file_paths),
-                "directories": sorted(directories)[:50],  # Top 50 dirs
-                "file_extensions": dict(sorted(ext_counts.items(), key=lambda x: -x[1])[:10]),
+                "directories": heapq.nsmallest(50, directories),  # Top 50 dirs
+                "file_extensions": dict(ext_counts.most_common(10)),
             },
-            "entry_points": entry_points[:10],
+            "entry_points": entry_points,
             "frameworks": detected_frameworks,
             "primary_language": primary_language,
             "architectural_patterns": architectural_patterns,
@@ -437,11 +1061,11 @@ async def analyze_packaged_repository(args: dict) -> dict:
             }
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Analysis failed: {str(e)}",
                 "type": type(e).__name__
             })}],
@@ -476,7 +1100,7 @@ async def identify_story_components(args: dict) -> dict:
 
     if not analysis:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "No analysis provided. Run analyze_packaged_repository first."
             })}],
             "isError": True,
@@ -491,68 +1115,68 @@ async def identify_story_components(args: dict) -> dict:
         primary_language = analysis.get("primary_language", "Unknown")
 
         # Build chapters based on what's present
-        chapters = []
+        chapters: list[ChapterComponent] = []
         narrative_hooks = []
 
         # Chapter 1: The Beginning (Entry Points)
         if entry_points:
             main_entry = entry_points[0]
-            chapters.append({
-                "number": 1,
-                "title": "Where It All Begins",
-                "focus": "entry_points",
-                "key_files": entry_points[:3],
-                "narrative_hook": f"Our journey starts at {main_entry}, where the application comes to life.",
-                "learning_goals": ["Understand how the application initializes", "Trace the startup flow"],
-            })
+            chapters.append(ChapterComponent(
+                number=1,
+                title="Where It All Begins",
+                focus="entry_points",
+                key_files=entry_points[:3],
+                narrative_hook=f"Our journey starts at {main_entry}, where the application comes to life.",
+                learning_goals=["Understand how the application initializes", "Trace the startup flow"],
+            ))
             narrative_hooks.append(f"The application awakens in {main_entry}")
 
         # Chapter 2: The Architecture (Patterns)
         if patterns:
             pattern_desc = " and ".join(patterns[:2])
-            chapters.append({
-                "number": 2,
-                "title": "The Architecture",
-                "focus": "patterns",
-                "patterns": patterns,
-                "narrative_hook": f"Built on {pattern_desc}, the codebase reveals its structure.",
-                "learning_goals": [f"Understand the {p} pattern" for p in patterns[:3]],
-            })
+            chapters.append(ChapterComponent(
+                number=2,
+                title="The Architecture",
+                focus="patterns",
+                patterns=patterns,
+                narrative_hook=f"Built on {pattern_desc}, the codebase reveals its structure.",
+                learning_goals=[f"Understand the {p} pattern" for p in patterns[:3]],
+            ))
             narrative_hooks.append(f"A {pattern_desc} architecture emerges")
 
         # Chapter 3: The Tools of Trade (Frameworks)
         if frameworks:
             main_framework = frameworks[0]
-            chapters.append({
-                "number": 3,
-                "title": "The Tools of the Trade",
-                "focus": "frameworks",
-                "frameworks": frameworks,
-                "narrative_hook": f"Powered by {main_framework}, the developers chose their weapons wisely.",
-                "learning_goals": [f"Learn how {f} is used" for f in frameworks[:3]],
-            })
+            chapters.append(ChapterComponent(
+                number=3,
+                title="The Tools of the Trade",
+                focus="frameworks",
+                frameworks=frameworks,
+                narrative_hook=f"Powered by {main_framework}, the developers chose their weapons wisely.",
+                learning_goals=[f"Learn how {f} is used" for f in frameworks[:3]],
+            ))
             narrative_hooks.append(f"{main_framework} powers the application")
 
         # Chapter 4: The Core (Main Modules)
         if core_modules:
-            chapters.append({
-                "number": 4,
-                "title": "The Heart of the System",
-                "focus": "core_modules",
-                "modules": core_modules[:5],
-                "narrative_hook": "At the core, these modules work in harmony.",
-                "learning_goals": ["Understand the main components", "See how modules interact"],
-            })
+            chapters.append(ChapterComponent(
+                number=4,
+                title="The Heart of the System",
+                focus="core_modules",
+                modules=core_modules[:5],
+                narrative_hook="At the core, these modules work in harmony.",
+                learning_goals=["Understand the main components", "See how modules interact"],
+            ))
             narrative_hooks.append(f"Core modules: {', '.join(core_modules[:3])}")
 
         # Chapter 5: Bringing It Together
-        chapters.append({
-            "number": len(chapters) + 1,
-            "title": "Bringing It Together",
-            "focus": "synthesis",
-            "narrative_hook": f"Written in {primary_language}, this codebase tells a story of craftsmanship.",
-            "learning_goals": ["See the big picture", "Understand the design decisions"],
-        })
+        chapters.append(ChapterComponent(
+            number=len(chapters) + 1,
+            title="Bringing It Together",
+            focus="synthesis",
+            narrative_hook=f"Written in {primary_language}, this codebase tells a story of craftsmanship.",
+            learning_goals=["See the big picture", "Understand the design decisions"],
+        ))
 
         # Apply narrative style adjustments
         style_modifiers = {
@@ -574,7 +1198,7 @@ async def identify_story_components(args: dict) -> dict:
         result = {
             "success": True,
             "story_components": {
-                "chapters": chapters,
+                "chapters": [chapter.to_dict() for chapter in chapters],
                 "narrative_hooks": narrative_hooks,
                 "key_concepts": key_concepts[:10],
                 "total_chapters": len(chapters),
@@ -587,11 +1211,11 @@ async def identify_story_components(args: dict) -> dict:
             }
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Story component identification failed: {str(e)}",
                 "type": type(e).__name__
             })}],
@@ -627,7 +1251,7 @@ async def generate_analysis_summary(args: dict) -> dict:
 
     if not analysis:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "No analysis provided."
             })}],
             "isError": True,
@@ -644,38 +1268,39 @@ async def generate_analysis_summary(args: dict) -> dict:
         chapters = story_components.get("story_components", {}).get("chapters", [])
         narrative_hooks = story_components.get("story_components", {}).get("narrative_hooks", [])
 
-        # Build summary text
-        summary_parts = []
+        # Build summary text, one markdown line per write
+        buf = io.StringIO()
+        w = buf.write
 
         # Overview
-        summary_parts.append(f"## Repository Overview\n")
-        summary_parts.append(f"- **Primary Language**: {primary_language}")
-        summary_parts.append(f"- **Total Files**: {structure.get('total_files', 'Unknown')}")
+        w("## Repository Overview\n\n")
+        w(f"- **Primary Language**: {primary_language}\n")
+        w(f"- **Total Files**: {structure.get('total_files', 'Unknown')}\n")
         if frameworks:
-            summary_parts.append(f"- **Frameworks**: {', '.join(frameworks)}")
+            w(f"- **Frameworks**: {', '.join(frameworks)}\n")
         if patterns:
-            summary_parts.append(f"- **Architecture**: {', '.join(patterns)}")
+            w(f"- **Architecture**: {', '.join(patterns)}\n")
 
         # Key Findings
-        summary_parts.append(f"\n## Key Findings\n")
+        w("\n## Key Findings\n\n")
         if entry_points:
-            summary_parts.append(f"- Entry point: `{entry_points[0]}`")
+            w(f"- Entry point: `{entry_points[0]}`\n")
         if frameworks:
-            summary_parts.append(f"- Built with: {frameworks[0]}")
+            w(f"- Built with: {frameworks[0]}\n")
         if patterns:
-            summary_parts.append(f"- Follows: {patterns[0]} pattern")
+            w(f"- Follows: {patterns[0]} pattern\n")
 
         # Story Structure
         if chapters:
-            summary_parts.append(f"\n## Recommended Story Structure\n")
+            w("\n## Recommended Story Structure\n\n")
             for chapter in chapters:
-                summary_parts.append(f"- **Chapter {chapter['number']}: {chapter['title']}** - {chapter.get('narrative_hook', '')}")
+                w(f"- **Chapter {chapter['number']}: {chapter['title']}** - {chapter.get('narrative_hook', '')}\n")
 
         # Narrative Hooks
         if narrative_hooks:
-            summary_parts.append(f"\n## Narrative Hooks\n")
+            w("\n## Narrative Hooks\n\n")
             for hook in narrative_hooks[:5]:
-                summary_parts.append(f"- {hook}")
+                w(f"- {hook}\n")
 
         # Recommendations
         recommendations = []
@@ -691,7 +1316,7 @@ async def generate_analysis_summary(args: dict) -> dict:
             if not patterns:
                 recommendations.append("No clear architecture detected - focus on individual components")
 
-        summary_text = "\n".join(summary_parts)
+        summary_text = buf.getvalue().removesuffix("\n")
 
         result = {
             "success": True,
@@ -715,11 +1340,11 @@ async def generate_analysis_summary(args: dict) -> dict:
         )
         result["artifact_path"] = artifact_path
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Summary generation failed: {str(e)}",
                 "type": type(e).__name__
             })}],
@@ -761,7 +1386,7 @@ async def get_repository_artifact(args: dict) -> dict:
 
     if not github_url:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "github_url is required"
             })}],
             "isError": True,
@@ -777,37 +1402,38 @@ async def get_repository_artifact(args: dict) -> dict:
         }
         ext = ext_map.get(artifact_type, "json")
 
-        # Try common formats for packaged_repository
-        artifact_path = _get_artifact_path(github_url, artifact_type, ext)
+        # packaged_repository may be in any output format
+        if artifact_type == "packaged_repository":
+            artifact_path = _resolve_packaged_path(github_url)
+        else:
+            artifact_path = _get_artifact_path(github_url, artifact_type, ext, create=False)
+            if not os.path.exists(artifact_path):
+                artifact_path = None
 
-        if not os.path.exists(artifact_path):
-            # Try other extensions for packaged_repository
-            if artifact_type == "packaged_repository":
-                for try_ext in ["md", "xml", "json"]:
-                    alt_path = _get_artifact_path(github_url, artifact_type, try_ext)
-                    if os.path.exists(alt_path):
-                        artifact_path = alt_path
-                        break
-
-        if not os.path.exists(artifact_path):
+        if artifact_path is None:
             return {
-                "content": [{"type": "text", "text": json.dumps({
+                "content": [{"type": "text", "text": _dumps({
                     "error": f"Artifact not found: {artifact_type}",
                     "github_url": github_url,
-                    "searched_path": artifact_path,
+                    "searched_path": _get_artifact_path(
+                        github_url, artifact_type, ext, create=False
+                    ),
                     "hint": "Run package_repository first to create artifacts"
                 })}],
                 "isError": True,
             }
 
-        with open(artifact_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        text = await _read_artifact_text(artifact_path)
+        content: str | orjson.Fragment = text
+        content_length = len(text)
 
-        # Parse JSON if applicable
+        # Parse JSON if applicable; the parsed value is encoded once and that
+        # encoding is both measured and embedded in the response as-is
         if ext == "json":
             try:
-                content = json.loads(content)
-            except json.JSONDecodeError:
+                encoded = orjson.dumps(orjson.loads(text))
+                content, content_length = orjson.Fragment(encoded), len(encoded)
+            except orjson.JSONDecodeError:
                 pass  # Return as string if not valid JSON
 
         result = {
@@ -816,14 +1442,14 @@ async def get_repository_artifact(args: dict) -> dict:
             "artifact_path": artifact_path,
             "github_url": github_url,
             "content": content,
-            "content_length": len(str(content)),
+            "content_length": content_length,
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Failed to retrieve artifact: {str(e)}",
                 "type": type(e).__name__
             })}],
@@ -855,7 +1481,7 @@ async def explore_file_in_package(args: dict) -> dict:
 
     if not github_url or not file_path:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "Both github_url and file_path are required"
             })}],
             "isError": True,
@@ -863,16 +1489,11 @@ async def explore_file_in_package(args: dict) -> dict:
 
     try:
         # Get the packaged repository artifact
-        packaged_path = None
-        for ext in ["md", "xml", "json"]:
-            path = _get_artifact_path(github_url, "packaged_repository", ext)
-            if os.path.exists(path):
-                packaged_path = path
-                break
+        packaged_path = _resolve_packaged_path(github_url)
 
         if not packaged_path:
             return {
-                "content": [{"type": "text", "text": json.dumps({
+                "content": [{"type": "text", "text": _dumps({
                     "error": "Packaged repository not found",
                     "github_url": github_url,
                     "hint": "Run package_repository first"
@@ -880,53 +1501,48 @@ async def explore_file_in_package(args: dict) -> dict:
                 "isError": True,
             }
 
-        with open(packaged_path, "r", encoding="utf-8") as f:
-            packaged_content = f.read()
-
-        # Extract the specific file based on format
+        packaged_format = packaged_path.rsplit(".", 1)[-1]
         file_content = None
-
-        # Try markdown format: ## File: path\n````lang\ncontent\n```` (Repomix uses 4 backticks)
-        md_pattern = rf"## File: {re.escape(file_path)}\n````[^\n]*\n(.*?)````"
-        md_match = re.search(md_pattern, packaged_content, re.DOTALL)
-        if md_match:
-            file_content = md_match.group(1)
-
-        # Try with 3 backticks as fallback
-        if not file_content:
-            md_pattern = rf"## File: {re.escape(file_path)}\n```[^\n]*\n(.*?)```"
-            md_match = re.search(md_pattern, packaged_content, re.DOTALL)
-            if md_match:
-                file_content = md_match.group(1)
-
-        # Try single # File: format
-        if not file_content:
-            md_pattern = rf"# File: {re.escape(file_path)}\n```[^\n]*\n(.*?)```"
-            md_match = re.search(md_pattern, packaged_content, re.DOTALL)
-            if md_match:
-                file_content = md_match.group(1)
-
-        # Try XML format: <file path="path"><content>...</content></file>
-        if not file_content:
-            xml_pattern = rf'<file path="{re.escape(file_path)}"[^>]*>\s*<content>(.*?)</content>'
-            xml_match = re.search(xml_pattern, packaged_content, re.DOTALL)
-            if xml_match:
-                file_content = xml_match.group(1)
-
-        # Try simpler markdown format without fences
-        if not file_content:
-            simple_pattern = rf"## File: {re.escape(file_path)}\n(.*?)(?=\n## File:|$)"
-            simple_match = re.search(simple_pattern, packaged_content, re.DOTALL)
-            if simple_match:
-                file_content = simple_match.group(1).strip()
+        json_files = None
+
+        if packaged_format == "json":
+            # JSON packages map paths to contents directly; no regex needed
+            json_files = await _load_packaged_json_files(packaged_path)
+            if json_files is not None:
+                file_content = json_files.get(file_path)
+        elif packaged_format == "md":
+            st = os.stat(packaged_path)
+            if (
+                st.st_size >= _LARGE_ARTIFACT_BYTES
+                and (packaged_path, st.st_mtime_ns, st.st_size) not in _PACKAGED_INDEXES
+            ):
+                # Large markdown artifacts that are not indexed yet are scanned
+                # first so a single lookup does not hold the whole package in memory
+                file_content = await asyncio.to_thread(
+                    _stream_fenced_file, packaged_path, file_path
+                )
+
+        if not file_content and json_files is None:
+            packaged_content, index = await _load_packaged_index(packaged_path)
+
+            # Extract the specific file with the patterns for this output
+            # style; an indexed file is matched within its own section only
+            span = index.get(file_path)
+            patterns = _file_patterns(file_path, packaged_format if packaged_format != "json" else None)
+            for anchor, pattern, strip in patterns:
+                match = pattern.search(packaged_content, *span) if span else None
+                if not match:
+                    match = _search_from_anchor(packaged_content, anchor, pattern)
+                if match:
+                    file_content = match.group(1).strip() if strip else match.group(1)
+                    if file_content:
+                        break
 
         if not file_content:
             # List available files for debugging
-            available_files = re.findall(r"## File: ([^\n]+)", packaged_content)[:20]
-            if not available_files:
-                available_files = re.findall(r"# File: ([^\n]+)", packaged_content)[:20]
+            available_files = list(islice(json_files if json_files is not None else index, 20))
             return {
-                "content": [{"type": "text", "text": json.dumps({
+                "content": [{"type": "text", "text": _dumps({
                     "error": f"File not found in package: {file_path}",
                     "available_files_sample": available_files,
                     "hint": "Check file path spelling or use analyze_packaged_repository to see structure"
@@ -943,11 +1559,11 @@ async def explore_file_in_package(args: dict) -> dict:
             "lines": file_content.count("\n") + 1,
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Failed to explore file: {str(e)}",
                 "type": type(e).__name__
             })}],
@@ -977,7 +1593,7 @@ async def list_available_artifacts(args: dict) -> dict:
 
     if not github_url:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": "github_url is required"
             })}],
             "isError": True,
@@ -987,7 +1603,7 @@ async def list_available_artifacts(args: dict) -> dict:
         parsed = _parse_github_url(github_url)
         if not parsed:
             return {
-                "content": [{"type": "text", "text": json.dumps({
+                "content": [{"type": "text", "text": _dumps({
                     "error": "Invalid GitHub URL"
                 })}],
                 "isError": True,
@@ -998,7 +1614,7 @@ async def list_available_artifacts(args: dict) -> dict:
 
         if not os.path.exists(repo_dir):
             return {
-                "content": [{"type": "text", "text": json.dumps({
+                "content": [{"type": "text", "text": _dumps({
                     "error": "No artifacts found for this repository",
                     "github_url": github_url,
                     "hint": "Run package_repository first to create artifacts"
@@ -1006,16 +1622,7 @@ async def list_available_artifacts(args: dict) -> dict:
                 "isError": True,
             }
 
-        artifacts = []
-        for file in os.listdir(repo_dir):
-            file_path = os.path.join(repo_dir, file)
-            stat = os.stat(file_path)
-            artifacts.append({
-                "name": file,
-                "path": file_path,
-                "size_bytes": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            })
+        artifacts = await _list_artifacts(repo_dir)
 
         result = {
             "success": True,
@@ -1026,11 +1633,11 @@ async def list_available_artifacts(args: dict) -> dict:
             "total_artifacts": len(artifacts),
         }
 
-        return {"content": [{"type": "text", "text": json.dumps(result)}]}
+        return {"content": [{"type": "text", "text": _dumps(result)}]}
 
     except Exception as e:
         return {
-            "content": [{"type": "text", "text": json.dumps({
+            "content": [{"type": "text", "text": _dumps({
                 "error": f"Failed to list artifacts: {str(e)}",
                 "type": type(e).__name__
             })}],
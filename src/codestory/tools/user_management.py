@@ -13,12 +13,18 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import case, cast, func, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
+from codestory.models.story import Story
 from codestory.models.user import APIKey, User
 
 if TYPE_CHECKING:
+    from sqlalchemy.engine import Result
+    from sqlalchemy.sql import ColumnElement, Executable
+
     from codestory.models.admin import AdminUser
 
 
@@ -33,6 +39,15 @@ class UserManagementService:
         """
         self.db = db
 
+    async def _read(self, statement: Executable) -> Result[Any]:
+        """Execute a read-only statement without autoflushing pending changes.
+
+        Statement compilation is already cached by the engine, so reads only
+        need to skip the flush check.
+        """
+        with self.db.no_autoflush:
+            return await self.db.execute(statement)
+
     async def search_users(
         self,
         search: str | None = None,
@@ -40,20 +55,38 @@ class UserManagementService:
         plan: str | None = None,
         page: int = 1,
         per_page: int = 20,
+        cursor: tuple[datetime, int] | None = None,
     ) -> dict[str, Any]:
         """Search and filter users with pagination.
 
+        Pages are OFFSET-based by default. Passing the previous response's
+        next_cursor switches to keyset pagination on (created_at, id), which
+        stays fast on deep pages and never skips users created in the same
+        instant; page is then ignored. Unfiltered listings seek on
+        ix_users_created_id, and plan + status filtered ones on
+        ix_users_tier_active_created (migration 0006).
+
         Args:
             search: Search term for email
             status: Filter by active/inactive
             plan: Filter by subscription tier
             page: Page number (1-indexed)
             per_page: Results per page
+            cursor: (created_at, id) of the last user on the previous page (optional)
 
         Returns:
-            Dict with users, total count, and pagination info
+            Dict with users, total count, pagination info and next_cursor
         """
-        query = select(User)
+        # Select only the listed columns; rows come back as plain mappings
+        # without ORM hydration
+        query = select(
+            User.id,
+            User.email,
+            User.is_active,
+            User.subscription_tier,
+            User.usage_quota,
+            User.created_at,
+        )
 
         # Apply filters
         if search:
@@ -66,34 +99,56 @@ class UserManagementService:
         if plan:
             query = query.where(User.subscription_tier == plan)
 
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.db.scalar(count_query) or 0
-
-        # Apply pagination
+        # Fetch the page with the filtered total as an extra column
         offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
-        query = query.order_by(User.created_at.desc())
+        total_column: ColumnElement[int]
+        if cursor is not None:
+            # Keyset: seek past the cursor; the window would only count the
+            # remaining rows, so the total comes from a scalar subquery
+            total_column = select(func.count()).select_from(query.subquery()).scalar_subquery()
+            paged = query.where(tuple_(User.created_at, User.id) < tuple_(*cursor))
+        else:
+            total_column = func.count().over()
+            paged = query.offset(offset)
+        paged = (
+            paged.add_columns(total_column.label("total"))
+            .order_by(User.created_at.desc(), User.id.desc())
+            .limit(per_page)
+        )
+
+        result = await self._read(paged)
+        rows = result.mappings().all()
 
-        result = await self.db.execute(query)
-        users = result.scalars().all()
+        if rows:
+            total = rows[0]["total"]
+        elif offset or cursor is not None:
+            # Past the last page there is no row to carry the total
+            count_query = select(func.count()).select_from(query.subquery())
+            total = (await self._read(count_query)).scalar() or 0
+        else:
+            total = 0
 
         return {
             "users": [
                 {
-                    "id": u.id,
-                    "email": u.email,
-                    "is_active": u.is_active,
-                    "subscription_tier": u.subscription_tier,
-                    "usage_quota": u.usage_quota,
-                    "created_at": u.created_at.isoformat() if u.created_at else None,
+                    "id": row["id"],
+                    "email": row["email"],
+                    "is_active": row["is_active"],
+                    "subscription_tier": row["subscription_tier"],
+                    "usage_quota": row["usage_quota"],
+                    "created_at": row["created_at"].isoformat() if row["created_at"] else None,
                 }
-                for u in users
+                for row in rows
             ],
             "total": total,
             "page": page,
             "per_page": per_page,
             "total_pages": (total + per_page - 1) // per_page,
+            "next_cursor": (
+                {"created_at": rows[-1]["created_at"].isoformat(), "id": rows[-1]["id"]}
+                if len(rows) == per_page and rows[-1]["created_at"]
+                else None
+            ),
         }
 
     async def get_user_details(self, user_id: int) -> dict[str, Any] | None:
@@ -105,20 +160,33 @@ class UserManagementService:
         Returns:
             User details dict or None if not found
         """
-        result = await self.db.execute(
-            select(User).where(User.id == user_id)
+        # stories and api_keys default to selectin loading; only their counts
+        # are needed, so skip those loads (and fail loudly if touched)
+        result = await self._read(
+            select(User)
+            .where(User.id == user_id)
+            .options(raiseload(User.stories), raiseload(User.api_keys))
         )
         user = result.scalar_one_or_none()
 
         if not user:
             return None
 
-        # Count stories
-        story_count = len(user.stories) if user.stories else 0
-
-        # Count API keys
-        api_key_count = len(user.api_keys) if user.api_keys else 0
-        active_api_keys = sum(1 for k in user.api_keys if k.is_active) if user.api_keys else 0
+        # Count stories and API keys in SQL rather than loading the relationships
+        counts = await self._read(
+            select(
+                select(func.count(Story.id))
+                .where(Story.user_id == user_id)
+                .scalar_subquery(),
+                select(func.count(APIKey.id))
+                .where(APIKey.user_id == user_id)
+                .scalar_subquery(),
+                select(func.coalesce(func.sum(case((APIKey.is_active, 1), else_=0)), 0))
+                .where(APIKey.user_id == user_id)
+                .scalar_subquery(),
+            )
+        )
+        story_count, api_key_count, active_api_keys = tuple(counts.one())
 
         return {
             "id": user.id,
@@ -158,40 +226,64 @@ class UserManagementService:
         Returns:
             Updated user details or None if not found
         """
-        result = await self.db.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+        values = {
+            field: value
+            for field, value in (
+                ("email", email),
+                ("subscription_tier", subscription_tier),
+                ("usage_quota", usage_quota),
+                ("preferences", preferences),
+            )
+            if value is not None
+        }
 
-        if not user:
-            return None
+        # Update in one statement, reading the previous values from a locked
+        # snapshot of the row so the change log can still be built. The
+        # snapshot only matches when some field actually differs, so a no-op
+        # save neither writes, locks nor commits.
+        row = None
+        if values:
+            old = (
+                select(User.id, *(getattr(User, field) for field in values))
+                .where(
+                    User.id == user_id,
+                    or_(*(getattr(User, field).is_distinct_from(value) for field, value in values.items())),
+                )
+                .with_for_update()
+                .subquery("old")
+            )
+            result = await self.db.execute(
+                update(User)
+                .where(User.id == old.c.id)
+                .values(**values)
+                .returning(User.updated_at, *(old.c[field] for field in values))
+                .execution_options(synchronize_session=False)
+            )
+            row = result.first()
 
-        changes = {}
-        if email is not None and email != user.email:
-            changes["email"] = {"old": user.email, "new": email}
-            user.email = email
-
-        if subscription_tier is not None and subscription_tier != user.subscription_tier:
-            changes["subscription_tier"] = {
-                "old": user.subscription_tier,
-                "new": subscription_tier,
+        if row is None:
+            result = await self._read(select(User.updated_at).where(User.id == user_id))
+            current = result.first()
+            if current is None:
+                return None
+            return {
+                "user_id": user_id,
+                "changes": {},
+                "updated_at": current.updated_at.isoformat() if current.updated_at else None,
             }
-            user.subscription_tier = subscription_tier
-
-        if usage_quota is not None and usage_quota != user.usage_quota:
-            changes["usage_quota"] = {"old": user.usage_quota, "new": usage_quota}
-            user.usage_quota = usage_quota
-
-        if preferences is not None:
-            changes["preferences"] = {"old": user.preferences, "new": preferences}
-            user.preferences = preferences
 
         await self.db.commit()
 
+        changes = {}
+        for field, new in values.items():
+            previous = row._mapping[old.c[field]]
+            if field == "preferences" or new != previous:
+                changes[field] = {"old": previous, "new": new}
+
         return {
             "user_id": user_id,
             "changes": changes,
-            "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None,
         }
 
     async def suspend_user(
@@ -208,23 +300,34 @@ class UserManagementService:
         Returns:
             Suspension details or None if not found
         """
+        # Deactivate and record the reason in preferences in one statement;
+        # was_active comes from a locked snapshot of the row
+        old = (
+            select(User.id, User.is_active)
+            .where(User.id == user_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        suspension = func.jsonb_build_object(
+            "suspension_reason", reason,
+            "suspended_at", datetime.utcnow().isoformat(),
+            type_=JSONB,
+        )
         result = await self.db.execute(
-            select(User).where(User.id == user_id)
+            update(User)
+            .where(User.id == old.c.id)
+            .values(
+                is_active=False,
+                preferences=func.coalesce(User.preferences, cast({}, JSONB)).op("||")(suspension),
+            )
+            .returning(old.c.is_active)
+            .execution_options(synchronize_session=False)
         )
-        user = result.scalar_one_or_none()
+        was_active = result.scalar_one_or_none()
 
-        if not user:
+        if was_active is None:
             return None
 
-        was_active = user.is_active
-        user.is_active = False
-
-        # Store suspension reason in preferences
-        if user.preferences is None:
-            user.preferences = {}
-        user.preferences["suspension_reason"] = reason
-        user.preferences["suspended_at"] = datetime.utcnow().isoformat()
-
         await self.db.commit()
 
         return {
@@ -243,21 +346,22 @@ class UserManagementService:
         Returns:
             Unsuspension details or None if not found
         """
+        # Reactivate and clear suspension info from preferences
         result = await self.db.execute(
-            select(User).where(User.id == user_id)
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                is_active=True,
+                preferences=User.preferences.op("-", return_type=JSONB)(literal("suspension_reason"))
+                .op("-", return_type=JSONB)(literal("suspended_at")),
+            )
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
         )
-        user = result.scalar_one_or_none()
 
-        if not user:
+        if result.scalar_one_or_none() is None:
             return None
 
-        user.is_active = True
-
-        # Clear suspension info from preferences
-        if user.preferences:
-            user.preferences.pop("suspension_reason", None)
-            user.preferences.pop("suspended_at", None)
-
         await self.db.commit()
 
         return {
@@ -328,7 +432,7 @@ class UserManagementService:
         """
         from codestory.core.security import create_access_token
 
-        result = await self.db.execute(
+        result = await self._read(
             select(User).where(User.id == user_id)
         )
         user = result.scalar_one_or_none()
@@ -367,7 +471,7 @@ class UserManagementService:
         Returns:
             List of API key details
         """
-        result = await self.db.execute(
+        result = await self._read(
             select(APIKey).where(APIKey.user_id == user_id)
         )
         keys = result.scalars().all()
@@ -401,17 +505,19 @@ class UserManagementService:
             Revocation details or None if not found
         """
         result = await self.db.execute(
-            select(APIKey).where(
+            update(APIKey)
+            .where(
                 APIKey.id == key_id,
                 APIKey.user_id == user_id,
             )
+            .values(is_active=False)
+            .returning(APIKey.id)
+            .execution_options(synchronize_session=False)
         )
-        key = result.scalar_one_or_none()
 
-        if not key:
+        if result.scalar_one_or_none() is None:
             return None
 
-        key.is_active = False
         await self.db.commit()
 
         return {
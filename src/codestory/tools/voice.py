@@ -4,14 +4,503 @@ Tools for generating audio narration using ElevenLabs.
 Uses Claude Agent SDK @tool decorator pattern.
 """
 
+import asyncio
+import contextlib
+import hashlib
 import os
+import random
+import re
+import tempfile
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Any
 
 import httpx
+import orjson
 from claude_agent_sdk import tool
 
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
 
+# Model used when a request does not name one; eleven_flash_v2_5 trades some
+# quality for the lowest time to first byte
+DEFAULT_MODEL_ID = "eleven_turbo_v2"
+
+# Paragraph break between narration segments: a blank line, tolerating \r\n,
+# trailing whitespace and runs of several blank lines
+_SEGMENT_RE = re.compile(r"\s*\n\s*\n\s*")
+
+# Narration segments are packed into requests of up to this many characters
+# (below ElevenLabs' 5000 character limit), joined by a paragraph break
+_MAX_REQUEST_CHARS = 4500
+_SEGMENT_SEPARATOR = "\n\n"
+
+# End of a sentence (punctuation, closing quotes/brackets, then whitespace);
+# segments over _MAX_REQUEST_CHARS are split after one where possible
+_SENTENCE_END_RE = re.compile(r"[.!?…][\"'”’)\]]*\s+")
+
+# Voice settings used for any the caller leaves out
+_DEFAULT_SETTINGS: Mapping[str, Any] = MappingProxyType({
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.0,
+    "use_speaker_boost": True,
+})
+
+# Default voice profiles for different content types
+_PROFILES: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "technical": MappingProxyType({
+        "voice_id": "21m00Tcm4TlvDq8ikWAM",  # Rachel - clear, professional
+        "name": "Rachel",
+        "settings": MappingProxyType({
+            "stability": 0.75,
+            "similarity_boost": 0.75,
+            "style": 0.0,
+            "use_speaker_boost": True,
+        }),
+    }),
+    "conversational": MappingProxyType({
+        "voice_id": "EXAVITQu4vr4xnSDxMaL",  # Bella - friendly
+        "name": "Bella",
+        "settings": MappingProxyType({
+            "stability": 0.5,
+            "similarity_boost": 0.8,
+            "style": 0.5,
+            "use_speaker_boost": True,
+        }),
+    }),
+    "educational": MappingProxyType({
+        "voice_id": "onwK4e9ZLuTAKqWW03F9",  # Daniel - authoritative
+        "name": "Daniel",
+        "settings": MappingProxyType({
+            "stability": 0.7,
+            "similarity_boost": 0.7,
+            "style": 0.3,
+            "use_speaker_boost": True,
+        }),
+    }),
+})
+
+
+def _profile_response(profile: Mapping[str, Any], content_type: str) -> str:
+    """Render the select_voice_profile response text for a profile."""
+    return orjson.dumps({
+        "voice_id": profile["voice_id"],
+        "voice_name": profile["name"],
+        "settings": dict(profile["settings"]),
+        "content_type": content_type,
+    }).decode()
+
+
+# Responses for the known content types never change, so render them once
+_PROFILE_RESPONSES: Mapping[str, str] = MappingProxyType({
+    content_type: _profile_response(profile, content_type)
+    for content_type, profile in _PROFILES.items()
+})
+
+# Maximum number of ElevenLabs requests in flight at once; narration fans
+# its segments out concurrently and this keeps it within the account quota
+_TTS_SEMAPHORE = asyncio.Semaphore(int(os.environ.get("ELEVENLABS_CONCURRENCY", "8")))
+
+# Transient ElevenLabs failures are attempted _RETRY_ATTEMPTS times in total
+# (three retries), backing off exponentially with full jitter (capped at
+# _RETRY_MAX_DELAY seconds); a Retry-After from the server is honoured up to
+# _RETRY_AFTER_MAX seconds
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_RETRY_ATTEMPTS = 4
+_RETRY_BASE_DELAY = 0.3
+_RETRY_MAX_DELAY = 8.0
+_RETRY_AFTER_MAX = 60.0
+
+# Recently synthesized single-segment audio by content key (see
+# _tts_cache_key), least recently used first, holding at most
+# _TTS_CACHE_BYTES of audio; repeated intros and transitions skip the API
+_TTS_CACHE: OrderedDict[bytes, bytes] = OrderedDict()
+_TTS_CACHE_BYTES = int(os.environ.get("ELEVENLABS_CACHE_BYTES", str(64 << 20)))
+_tts_cache_bytes = 0
+
+# generate_audio_segment saves audio here when the caller gives no
+# output_path, named after its content; only the newest SEGMENT_KEEP files
+# are kept
+SEGMENT_DIR = os.environ.get(
+    "CODESTORY_SEGMENT_DIR", os.path.join(tempfile.gettempdir(), "codestory_segments")
+)
+SEGMENT_KEEP = int(os.environ.get("CODESTORY_SEGMENT_KEEP", "32"))
+_SEGMENT_FILE_RE = re.compile(r"segment_[0-9a-f]{16}\.mp3")
+
+# ElevenLabs API key, read once at import (see refresh_api_key)
+_API_KEY: str | None = os.environ.get("ELEVENLABS_API_KEY")
+
+# Shared ElevenLabs client, created on first use (see _get_client)
+_client: httpx.AsyncClient | None = None
+
+
+def refresh_api_key() -> str | None:
+    """Re-read ELEVENLABS_API_KEY (e.g. after a .env reload) and apply it to the shared client."""
+    global _API_KEY
+    _API_KEY = os.environ.get("ELEVENLABS_API_KEY")
+    if _client is not None:
+        _client.headers["xi-api-key"] = _API_KEY or ""
+    return _API_KEY
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP/2 keep-alive client, creating it on first use.
+
+    Reusing one client keeps connections (and their TLS sessions) open across
+    narration segments instead of handshaking on every request, and HTTP/2
+    multiplexes concurrent segments over one connection. The API key and
+    content negotiation headers are bound to the client rather than sent per
+    call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            headers={
+                "Accept": "audio/mpeg",
+                # MP3 is already compressed; don't ask for gzip on top
+                "Accept-Encoding": "identity",
+                "Content-Type": "application/json",
+                "xi-api-key": _API_KEY or "",
+            },
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared ElevenLabs client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _tts_cache_key(text: str, voice_id: str, model_id: str, settings_json: bytes) -> bytes:
+    """Hash everything that determines the synthesized audio into a cache key.
+
+    Whitespace in the text is normalized, so reflowed copies of the same
+    sentence share an entry. settings_json is the serialized voice_settings
+    object as sent in the request body.
+    """
+    material = orjson.dumps([" ".join(text.split()), voice_id, model_id]) + settings_json
+    return hashlib.blake2b(material, digest_size=16).digest()
+
+
+def _cache_get(key: bytes) -> bytes | None:
+    """Return cached audio for a key, marking it recently used."""
+    audio = _TTS_CACHE.get(key)
+    if audio is not None:
+        _TTS_CACHE.move_to_end(key)
+    return audio
+
+
+def _cache_put(key: bytes, audio: bytes) -> None:
+    """Cache audio, evicting least recently used entries beyond _TTS_CACHE_BYTES."""
+    global _tts_cache_bytes
+    if len(audio) > _TTS_CACHE_BYTES:
+        return
+    previous = _TTS_CACHE.pop(key, None)
+    if previous is not None:
+        _tts_cache_bytes -= len(previous)
+    _TTS_CACHE[key] = audio
+    _tts_cache_bytes += len(audio)
+    while _tts_cache_bytes > _TTS_CACHE_BYTES:
+        _, evicted = _TTS_CACHE.popitem(last=False)
+        _tts_cache_bytes -= len(evicted)
+
+
+def _settings_json(voice_settings: Mapping[str, Any]) -> bytes:
+    """Serialize voice settings, filling in defaults, as sent in the request body."""
+    return orjson.dumps({**_DEFAULT_SETTINGS, **voice_settings})
+
+
+@lru_cache(maxsize=8)
+def _payload_prefix(model_id: str) -> bytes:
+    """Serialized start of a TTS request body, up to the voice_settings value."""
+    return b'{"model_id":' + orjson.dumps(model_id) + b',"voice_settings":'
+
+
+def _error_template(status_code: int) -> Mapping[str, Any]:
+    """Read-only tool error result for an ElevenLabs HTTP error status."""
+    return MappingProxyType({
+        "content": (
+            MappingProxyType({"type": "text", "text": f"ElevenLabs API error: {status_code}"}),
+        ),
+        "isError": True,
+    })
+
+
+# Error results for the statuses ElevenLabs commonly returns, built once so a
+# burst of rate-limited segments doesn't render a new message per failure
+_API_ERRORS: Mapping[int, Mapping[str, Any]] = MappingProxyType({
+    status_code: _error_template(status_code) for status_code in (401, 403, 429, 500, 502, 503)
+})
+
+
+def _api_error(status_code: int) -> dict[str, Any]:
+    """Tool error result for an ElevenLabs HTTP error status.
+
+    The result is copied from the frozen template, so callers may modify it.
+    """
+    template = _API_ERRORS.get(status_code) or _error_template(status_code)
+    return {**template, "content": [dict(block) for block in template["content"]]}
+
+
+def _failure_message(error: BaseException) -> str:
+    """Describe why a narration request failed, for the tool result."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"ElevenLabs API error: {error.response.status_code}"
+    return str(error) or type(error).__name__
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a failed request.
+
+    Honours a Retry-After header (seconds or an HTTP date, up to
+    _RETRY_AFTER_MAX); otherwise picks a random delay up to an exponentially
+    growing cap so concurrent segments don't retry in lockstep.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(UTC)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), _RETRY_AFTER_MAX)
+    return random.uniform(0, min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2**attempt))
+
+
+async def _synthesize(
+    text: str,
+    voice_id: str,
+    voice_settings: dict[str, Any],
+    model_id: str = DEFAULT_MODEL_ID,
+    *,
+    cache: bool = True,
+) -> bytes:
+    """Synthesize one piece of text with ElevenLabs and return the audio bytes.
+
+    Uses the streaming endpoint so audio is received as it is generated
+    rather than after the whole segment has been rendered. With cache, the
+    text is looked up in and stored to _TTS_CACHE; callers pass cache=False
+    for packed multi-segment requests, which are unlikely to repeat.
+
+    Rate limiting (429) and transient 5xx responses are retried with backoff,
+    for _RETRY_ATTEMPTS attempts in total (see _retry_delay).
+
+    Raises:
+        httpx.HTTPStatusError: If ElevenLabs returns a non-2xx response that is
+            not retryable, or keeps failing after _RETRY_ATTEMPTS attempts
+    """
+    url = f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}/stream"
+
+    settings_json = _settings_json(voice_settings)
+
+    key = _tts_cache_key(text, voice_id, model_id, settings_json) if cache else None
+    if key is not None and (audio := _cache_get(key)) is not None:
+        return audio
+
+    # Only the settings and text vary; the rest of the body is prebuilt
+    body = _payload_prefix(model_id) + settings_json + b',"text":' + orjson.dumps(text) + b"}"
+
+    for attempt in range(_RETRY_ATTEMPTS):
+        buffer = bytearray()
+        try:
+            async with _TTS_SEMAPHORE, _get_client().stream(
+                "POST",
+                url,
+                params={"optimize_streaming_latency": 3},
+                content=body,
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(8192):
+                    buffer += chunk
+            break
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in _RETRY_STATUSES or attempt == _RETRY_ATTEMPTS - 1:
+                raise
+            # Sleep outside the semaphore so other segments keep its slot busy
+            await asyncio.sleep(_retry_delay(e.response, attempt))
+
+    audio = bytes(buffer)
+    if key is not None:
+        _cache_put(key, audio)
+    return audio
+
+
+def _split_segment(segment: str) -> list[str]:
+    """Split a segment into pieces of at most _MAX_REQUEST_CHARS characters.
+
+    Pieces end at the last sentence boundary that fits, else at the last
+    whitespace, and only mid-word when a single word exceeds the limit.
+    """
+    pieces: list[str] = []
+    while len(segment) > _MAX_REQUEST_CHARS:
+        # One extra character so a boundary right at the limit still counts
+        window = segment[: _MAX_REQUEST_CHARS + 1]
+        cut = 0
+        for match in _SENTENCE_END_RE.finditer(window):
+            cut = match.end()
+        if not cut:
+            cut = max(window.rfind(" "), window.rfind("\n"))
+        if cut <= 0:
+            cut = _MAX_REQUEST_CHARS
+        piece = segment[:cut].rstrip()
+        if piece:
+            pieces.append(piece)
+        segment = segment[cut:].lstrip()
+    if segment:
+        pieces.append(segment)
+    return pieces
+
+
+def _pack_segments(segments: list[str], lengths: list[int]) -> list[list[str]]:
+    """Greedily group adjacent segments into batches of at most _MAX_REQUEST_CHARS.
+
+    Lengths include the separator the batch is joined with. Segments are
+    expected to fit the limit on their own (see _split_segment).
+    """
+    batches: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    for segment, length in zip(segments, lengths, strict=True):
+        added = length + (len(_SEGMENT_SEPARATOR) if current else 0)
+        if current and size + added > _MAX_REQUEST_CHARS:
+            batches.append(current)
+            current, added = [], length
+            size = 0
+        current.append(segment)
+        size += added
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _plan_requests(
+    segments: list[str],
+    lengths: list[int],
+    cached: list[bytes | None],
+    *,
+    standalone_ends: bool = False,
+) -> tuple[list[list[str]], list[bytes | int]]:
+    """Decide which narration segments to request and how to reassemble them.
+
+    Segments with cached audio are not requested; the rest are packed into
+    batches (see _pack_segments). With standalone_ends, the first and last
+    segments (typically a reusable intro and outro) are requested on their
+    own so they are cached per segment, at the cost of up to two extra
+    requests. Returns the batches and, in script order, either cached audio
+    or the index of the batch that produces the audio.
+    """
+    batches: list[list[str]] = []
+    plan: list[bytes | int] = []
+    run: list[int] = []
+
+    def flush() -> None:
+        for batch in _pack_segments([segments[i] for i in run], [lengths[i] for i in run]):
+            plan.append(len(batches))
+            batches.append(batch)
+        run.clear()
+
+    last = len(segments) - 1
+    for i, audio in enumerate(cached):
+        if audio is not None:
+            flush()
+            plan.append(audio)
+        elif standalone_ends and (i == 0 or i == last):
+            flush()
+            plan.append(len(batches))
+            batches.append([segments[i]])
+        else:
+            run.append(i)
+    flush()
+    return batches, plan
+
+
+def _strip_id3(chunk: bytes) -> memoryview:
+    """Drop a leading ID3v2 tag so only MPEG frames remain (without copying)."""
+    view = memoryview(chunk)
+    if len(chunk) < 10 or chunk[:3] != b"ID3":
+        return view
+    # Tag size is a 28-bit syncsafe integer; a footer adds another 10 bytes
+    size = (chunk[6] << 21) | (chunk[7] << 14) | (chunk[8] << 7) | chunk[9]
+    if chunk[5] & 0x10:
+        size += 10
+    return view[10 + size:]
+
+
+# Most buffers a single writev() call accepts (IOV_MAX is 1024 on Linux)
+_WRITEV_MAX_BUFFERS = 1024
+
+
+def _write_mp3(output_path: str, chunks: list[bytes]) -> None:
+    """Write MP3 chunks into one file, keeping only the first chunk's tags.
+
+    Where the platform has writev() the chunks are handed to the kernel as a
+    batch of buffers instead of one write() per chunk, and never joined into
+    a single bytes object in memory.
+    """
+    buffers = [memoryview(chunks[0]), *(_strip_id3(chunk) for chunk in chunks[1:])]
+    with open(output_path, "wb", buffering=0) as f:
+        if not hasattr(os, "writev"):
+            for buffer in buffers:
+                f.write(buffer)
+            return
+        fd = f.fileno()
+        while buffers:
+            batch = buffers[:_WRITEV_MAX_BUFFERS]
+            written = os.writev(fd, batch)
+            # Drop fully written buffers and trim a partially written one
+            for i, buffer in enumerate(batch):
+                if written < len(buffer):
+                    buffers = [buffer[written:], *buffers[i + 1:]]
+                    break
+                written -= len(buffer)
+            else:
+                buffers = buffers[len(batch):]
+
+
+def _prune_segments(current: str) -> None:
+    """Delete all but the newest SEGMENT_KEEP saved segments."""
+    with os.scandir(SEGMENT_DIR) as it:
+        saved = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in it
+            if _SEGMENT_FILE_RE.fullmatch(entry.name) and entry.path != current
+        ]
+    saved.sort(reverse=True)
+    # The segment just saved counts towards the limit
+    for _, path in saved[max(SEGMENT_KEEP - 1, 0):]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def _save_segment(audio: bytes) -> str:
+    """Save segment audio under SEGMENT_DIR and return its path.
+
+    Repeated segments share a file, which is touched so it counts as recent.
+    """
+    os.makedirs(SEGMENT_DIR, exist_ok=True)
+    output_path = os.path.join(
+        SEGMENT_DIR, f"segment_{hashlib.blake2b(audio, digest_size=8).hexdigest()}.mp3"
+    )
+    try:
+        os.utime(output_path)
+    except FileNotFoundError:
+        _write_mp3(output_path, [audio])
+    _prune_segments(output_path)
+    return output_path
+
 
 @tool(
     name="select_voice_profile",
@@ -25,59 +514,12 @@ ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
 async def select_voice_profile(args: dict) -> dict:
     """Select voice profile based on content and preferences."""
     content_type = args.get("content_type", "technical")
-    preferences = args.get("preferences", {})
-
-    # Default voice profiles for different content types
-    profiles = {
-        "technical": {
-            "voice_id": "21m00Tcm4TlvDq8ikWAM",  # Rachel - clear, professional
-            "name": "Rachel",
-            "settings": {
-                "stability": 0.75,
-                "similarity_boost": 0.75,
-                "style": 0.0,
-                "use_speaker_boost": True,
-            },
-        },
-        "conversational": {
-            "voice_id": "EXAVITQu4vr4xnSDxMaL",  # Bella - friendly
-            "name": "Bella",
-            "settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.8,
-                "style": 0.5,
-                "use_speaker_boost": True,
-            },
-        },
-        "educational": {
-            "voice_id": "onwK4e9ZLuTAKqWW03F9",  # Daniel - authoritative
-            "name": "Daniel",
-            "settings": {
-                "stability": 0.7,
-                "similarity_boost": 0.7,
-                "style": 0.3,
-                "use_speaker_boost": True,
-            },
-        },
-    }
-
-    profile = profiles.get(content_type, profiles["technical"])
-
-    return {
-        "content": [
-            {
-                "type": "text",
-                "text": str(
-                    {
-                        "voice_id": profile["voice_id"],
-                        "voice_name": profile["name"],
-                        "settings": profile["settings"],
-                        "content_type": content_type,
-                    }
-                ),
-            }
-        ]
-    }
+
+    text = _PROFILE_RESPONSES.get(content_type)
+    if text is None:
+        text = _profile_response(_PROFILES["technical"], content_type)
+
+    return {"content": [{"type": "text", "text": text}]}
 
 
 @tool(
@@ -89,6 +531,8 @@ async def select_voice_profile(args: dict) -> dict:
         "voice_id": "ElevenLabs voice ID to use",
         "voice_settings": "Voice settings (stability, similarity_boost, etc.)",
         "output_format": "Audio format (mp3_44100_128, mp3_22050_64, etc.)",
+        "model_id": "ElevenLabs model (eleven_turbo_v2, eleven_flash_v2_5, etc.)",
+        "output_path": "Path to save the audio file (defaults to a file under SEGMENT_DIR)",
     },
 )
 async def generate_audio_segment(args: dict) -> dict:
@@ -97,66 +541,45 @@ async def generate_audio_segment(args: dict) -> dict:
     voice_id = args.get("voice_id", "21m00Tcm4TlvDq8ikWAM")
     voice_settings = args.get("voice_settings", {})
     output_format = args.get("output_format", "mp3_44100_128")
+    model_id = args.get("model_id", DEFAULT_MODEL_ID)
 
-    api_key = os.environ.get("ELEVENLABS_API_KEY")
-    if not api_key:
+    if not (_API_KEY or refresh_api_key()):
         return {
             "content": [{"type": "text", "text": "Error: ELEVENLABS_API_KEY not set"}],
             "isError": True,
         }
 
     try:
-        url = f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}"
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": api_key,
-        }
+        audio = await _synthesize(text, voice_id, voice_settings, model_id)
 
-        payload = {
-            "text": text,
-            "model_id": "eleven_turbo_v2",
-            "voice_settings": {
-                "stability": voice_settings.get("stability", 0.5),
-                "similarity_boost": voice_settings.get("similarity_boost", 0.75),
-                "style": voice_settings.get("style", 0.0),
-                "use_speaker_boost": voice_settings.get("use_speaker_boost", True),
-            },
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url, json=payload, headers=headers, timeout=60
-            )
-            response.raise_for_status()
-
-            # Return audio length estimate (actual audio would be saved to file)
-            audio_length_seconds = len(text) / 15  # Rough estimate: ~15 chars/sec
+        output_path = args.get("output_path")
+        if output_path:
+            await asyncio.to_thread(_write_mp3, output_path, [audio])
+        else:
+            output_path = await asyncio.to_thread(_save_segment, audio)
 
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": str(
-                            {
-                                "success": True,
-                                "audio_length_seconds": round(audio_length_seconds, 2),
-                                "voice_id": voice_id,
-                                "text_length": len(text),
-                                "format": output_format,
-                            }
-                        ),
-                    }
-                ]
-            }
+        audio_length_seconds = len(text) / 15  # Rough estimate: ~15 chars/sec
 
-    except httpx.HTTPStatusError as e:
         return {
             "content": [
-                {"type": "text", "text": f"ElevenLabs API error: {e.response.status_code}"}
-            ],
-            "isError": True,
+                {
+                    "type": "text",
+                    "text": orjson.dumps(
+                        {
+                            "success": True,
+                            "output_path": output_path,
+                            "audio_length_seconds": round(audio_length_seconds, 2),
+                            "voice_id": voice_id,
+                            "text_length": len(text),
+                            "format": output_format,
+                        }
+                    ).decode(),
+                }
+            ]
         }
+
+    except httpx.HTTPStatusError as e:
+        return _api_error(e.response.status_code)
     except Exception as e:
         return {
             "content": [{"type": "text", "text": f"Error: {e!s}"}],
@@ -172,6 +595,8 @@ async def generate_audio_segment(args: dict) -> dict:
         "script": "Complete narration script with chapter markers",
         "voice_profile": "Voice profile from select_voice_profile",
         "output_path": "Path to save the final audio file",
+        "cache_intro_outro": "Request the first and last segments separately so they are "
+        "cached for reuse across narrations (default false)",
     },
 )
 async def synthesize_narration(args: dict) -> dict:
@@ -179,6 +604,7 @@ async def synthesize_narration(args: dict) -> dict:
     script = args.get("script", "")
     voice_profile = args.get("voice_profile", {})
     output_path = args.get("output_path", "/tmp/narration.mp3")
+    cache_intro_outro = bool(args.get("cache_intro_outro", False))
 
     if not script:
         return {
@@ -186,31 +612,94 @@ async def synthesize_narration(args: dict) -> dict:
             "isError": True,
         }
 
+    if not (_API_KEY or refresh_api_key()):
+        return {
+            "content": [{"type": "text", "text": "Error: ELEVENLABS_API_KEY not set"}],
+            "isError": True,
+        }
+
     try:
-        # Split script into chapters/segments
-        segments = script.split("\n\n")
+        # Split script into chapters/segments on blank lines, dropping empty
+        # pieces so no request is spent on whitespace; paragraphs too long
+        # for one request are split at sentence boundaries
+        segments = [
+            piece
+            for segment in _SEGMENT_RE.split(script)
+            if segment.strip()
+            for piece in _split_segment(segment)
+        ]
         total_segments = len(segments)
-        estimated_duration = sum(len(s) / 15 for s in segments)
+        segment_lengths = list(map(len, segments))
+        estimated_duration = sum(segment_lengths) / 15
 
-        # In production, this would:
-        # 1. Generate audio for each segment
-        # 2. Concatenate audio files
-        # 3. Apply post-processing (normalization, noise reduction)
-        # 4. Save to output_path
+        # Reuse cached segments, pack the rest into as few requests as
+        # possible, then generate the batches concurrently (bounded by
+        # _TTS_SEMAPHORE); the plan keeps script order for concatenation
+        voice_id = voice_profile.get("voice_id", "21m00Tcm4TlvDq8ikWAM")
+        voice_settings = voice_profile.get("settings", {})
+        model_id = voice_profile.get("model_id", DEFAULT_MODEL_ID)
+        settings_json = _settings_json(voice_settings)
+        cached = [
+            _cache_get(_tts_cache_key(segment, voice_id, model_id, settings_json))
+            for segment in segments
+        ]
+        batches, plan = _plan_requests(
+            segments, segment_lengths, cached, standalone_ends=cache_intro_outro
+        )
+        results = await asyncio.gather(
+            *(
+                _synthesize(
+                    _SEGMENT_SEPARATOR.join(batch),
+                    voice_id,
+                    voice_settings,
+                    model_id,
+                    cache=len(batch) == 1,
+                )
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+        outputs = [item if isinstance(item, bytes) else results[item] for item in plan]
+        audio_segments = [audio for audio in outputs if isinstance(audio, bytes)]
+        failed_segments = sum(
+            len(batch)
+            for batch, result in zip(batches, results, strict=True)
+            if not isinstance(result, bytes)
+        )
+        first_error = next(
+            (_failure_message(result) for result in results if not isinstance(result, bytes)),
+            None,
+        )
+
+        if not audio_segments:
+            message = "Error: No audio generated for any segment"
+            if first_error is not None:
+                message += f" ({first_error})"
+            return {
+                "content": [{"type": "text", "text": message}],
+                "isError": True,
+            }
+
+        # Every segment shares one voice and output format, so the MP3 streams
+        # can be joined frame-for-frame without decoding or re-encoding
+        await asyncio.to_thread(_write_mp3, output_path, audio_segments)
 
         return {
             "content": [
                 {
                     "type": "text",
-                    "text": str(
+                    "text": orjson.dumps(
                         {
-                            "success": True,
+                            "success": failed_segments == 0,
                             "output_path": output_path,
-                            "segments_processed": total_segments,
+                            "segments_processed": total_segments - failed_segments,
+                            "requests": len(batches),
+                            "segments_failed": failed_segments,
+                            "first_error": first_error,
                             "estimated_duration_seconds": round(estimated_duration, 2),
                             "voice": voice_profile.get("voice_name", "default"),
                         }
-                    ),
+                    ).decode(),
                 }
             ]
         }
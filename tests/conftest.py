@@ -0,0 +1,28 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+from codestory.models import (
+    APIKey,
+    Base,
+    Repository,
+    Story,
+    StoryChapter,
+    StoryIntent,
+    User,
+)
+
+
+@pytest.fixture(scope="session")
+def table_names() -> frozenset[str]:
+    """Names of all tables registered in Base.metadata."""
+    return frozenset(Base.metadata.tables.keys())
+
+
+@pytest.fixture(scope="session")
+def model_attrs() -> dict[type[Base], frozenset[str]]:
+    """Attribute names of each mapped model, as reported by dir()."""
+    return {
+        model: frozenset(dir(model))
+        for model in (User, APIKey, Repository, Story, StoryChapter, StoryIntent)
+    }
@@ -18,115 +18,149 @@ from codestory.models import (
 class TestModelImports:
     """Test that all models import correctly."""
 
-    def test_base_metadata_tables(self) -> None:
+    def test_base_metadata_tables(self, table_names: frozenset[str]) -> None:
         """Test that all tables are registered in Base.metadata."""
-        expected_tables = {
-            "users",
-            "api_keys",
-            "repositories",
-            "stories",
-            "story_chapters",
-            "story_intents",
-        }
-        actual_tables = set(Base.metadata.tables.keys())
-        assert expected_tables == actual_tables
-
-    def test_user_model_attributes(self) -> None:
-        """Test User model has expected attributes."""
-        assert hasattr(User, "id")
-        assert hasattr(User, "email")
-        assert hasattr(User, "hashed_password")
-        assert hasattr(User, "is_active")
-        assert hasattr(User, "is_superuser")
-        assert hasattr(User, "subscription_tier")
-        assert hasattr(User, "usage_quota")
-        assert hasattr(User, "preferences")
-        assert hasattr(User, "created_at")
-        assert hasattr(User, "updated_at")
-        # Relationships
-        assert hasattr(User, "stories")
-        assert hasattr(User, "api_keys")
-
-    def test_api_key_model_attributes(self) -> None:
-        """Test APIKey model has expected attributes."""
-        assert hasattr(APIKey, "id")
-        assert hasattr(APIKey, "user_id")
-        assert hasattr(APIKey, "key_hash")
-        assert hasattr(APIKey, "name")
-        assert hasattr(APIKey, "permissions")
-        assert hasattr(APIKey, "rate_limit")
-        assert hasattr(APIKey, "is_active")
-        assert hasattr(APIKey, "last_used_at")
-        assert hasattr(APIKey, "expires_at")
-        assert hasattr(APIKey, "created_at")
-        # Relationships
-        assert hasattr(APIKey, "user")
-
-    def test_repository_model_attributes(self) -> None:
-        """Test Repository model has expected attributes."""
-        assert hasattr(Repository, "id")
-        assert hasattr(Repository, "url")
-        assert hasattr(Repository, "name")
-        assert hasattr(Repository, "owner")
-        assert hasattr(Repository, "default_branch")
-        assert hasattr(Repository, "description")
-        assert hasattr(Repository, "language")
-        assert hasattr(Repository, "analysis_cache")
-        assert hasattr(Repository, "last_analyzed_at")
-        assert hasattr(Repository, "created_at")
-        # Relationships
-        assert hasattr(Repository, "stories")
-
-    def test_story_model_attributes(self) -> None:
-        """Test Story model has expected attributes."""
-        assert hasattr(Story, "id")
-        assert hasattr(Story, "user_id")
-        assert hasattr(Story, "repository_id")
-        assert hasattr(Story, "intent_id")
-        assert hasattr(Story, "title")
-        assert hasattr(Story, "status")
-        assert hasattr(Story, "narrative_style")
-        assert hasattr(Story, "focus_areas")
-        assert hasattr(Story, "error_message")
-        assert hasattr(Story, "audio_url")
-        assert hasattr(Story, "transcript")
-        assert hasattr(Story, "duration_seconds")
-        assert hasattr(Story, "created_at")
-        assert hasattr(Story, "updated_at")
-        assert hasattr(Story, "completed_at")
-        # Relationships
-        assert hasattr(Story, "user")
-        assert hasattr(Story, "repository")
-        assert hasattr(Story, "intent")
-        assert hasattr(Story, "chapters")
-
-    def test_story_chapter_model_attributes(self) -> None:
-        """Test StoryChapter model has expected attributes."""
-        assert hasattr(StoryChapter, "id")
-        assert hasattr(StoryChapter, "story_id")
-        assert hasattr(StoryChapter, "order")
-        assert hasattr(StoryChapter, "title")
-        assert hasattr(StoryChapter, "script")
-        assert hasattr(StoryChapter, "audio_url")
-        assert hasattr(StoryChapter, "start_time")
-        assert hasattr(StoryChapter, "duration_seconds")
-        assert hasattr(StoryChapter, "created_at")
-        # Relationships
-        assert hasattr(StoryChapter, "story")
-
-    def test_story_intent_model_attributes(self) -> None:
-        """Test StoryIntent model has expected attributes."""
-        assert hasattr(StoryIntent, "id")
-        assert hasattr(StoryIntent, "user_id")
-        assert hasattr(StoryIntent, "repository_url")
-        assert hasattr(StoryIntent, "conversation_history")
-        assert hasattr(StoryIntent, "identified_goals")
-        assert hasattr(StoryIntent, "generated_plan")
-        assert hasattr(StoryIntent, "preferences")
-        assert hasattr(StoryIntent, "created_at")
-        assert hasattr(StoryIntent, "updated_at")
-        # Relationships
-        assert hasattr(StoryIntent, "story")
+        expected_tables = frozenset(
+            {
+                "users",
+                "api_keys",
+                "repositories",
+                "stories",
+                "story_chapters",
+                "story_intents",
+            }
+        )
+        assert expected_tables == table_names
+
+    @pytest.mark.parametrize(
+        ("model", "expected"),
+        [
+            pytest.param(
+                User,
+                {
+                    "id",
+                    "email",
+                    "hashed_password",
+                    "is_active",
+                    "is_superuser",
+                    "subscription_tier",
+                    "usage_quota",
+                    "preferences",
+                    "created_at",
+                    "updated_at",
+                    # Relationships
+                    "stories",
+                    "api_keys",
+                },
+                id="User",
+            ),
+            pytest.param(
+                APIKey,
+                {
+                    "id",
+                    "user_id",
+                    "key_hash",
+                    "name",
+                    "permissions",
+                    "rate_limit",
+                    "is_active",
+                    "last_used_at",
+                    "expires_at",
+                    "created_at",
+                    # Relationships
+                    "user",
+                },
+                id="APIKey",
+            ),
+            pytest.param(
+                Repository,
+                {
+                    "id",
+                    "url",
+                    "name",
+                    "owner",
+                    "default_branch",
+                    "description",
+                    "language",
+                    "analysis_cache",
+                    "last_analyzed_at",
+                    "created_at",
+                    # Relationships
+                    "stories",
+                },
+                id="Repository",
+            ),
+            pytest.param(
+                Story,
+                {
+                    "id",
+                    "user_id",
+                    "repository_id",
+                    "intent_id",
+                    "title",
+                    "status",
+                    "narrative_style",
+                    "focus_areas",
+                    "error_message",
+                    "audio_url",
+                    "transcript",
+                    "duration_seconds",
+                    "created_at",
+                    "updated_at",
+                    "completed_at",
+                    # Relationships
+                    "user",
+                    "repository",
+                    "intent",
+                    "chapters",
+                },
+                id="Story",
+            ),
+            pytest.param(
+                StoryChapter,
+                {
+                    "id",
+                    "story_id",
+                    "order",
+                    "title",
+                    "script",
+                    "audio_url",
+                    "start_time",
+                    "duration_seconds",
+                    "created_at",
+                    # Relationships
+                    "story",
+                },
+                id="StoryChapter",
+            ),
+            pytest.param(
+                StoryIntent,
+                {
+                    "id",
+                    "user_id",
+                    "repository_url",
+                    "conversation_history",
+                    "identified_goals",
+                    "generated_plan",
+                    "preferences",
+                    "created_at",
+                    "updated_at",
+                    # Relationships
+                    "story",
+                },
+                id="StoryIntent",
+            ),
+        ],
+    )
+    def test_model_attributes(
+        self,
+        model_attrs: dict[type[Base], frozenset[str]],
+        model: type[Base],
+        expected: set[str],
+    ) -> None:
+        """Test each model has its expected columns and relationships."""
+        attrs = model_attrs[model]
+        assert expected <= attrs, f"missing: {sorted(expected - attrs)}"
 
 
 class TestEnums:
@@ -0,0 +1,190 @@
+"""Tests for admin user management writes."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import ColumnElement, Executable
+
+from codestory.tools.user_management import UserManagementService
+
+UPDATED_AT = datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC)
+
+
+class FakeRow:
+    """Result row whose columns are looked up by name, like a RETURNING row."""
+
+    def __init__(self, **columns: Any) -> None:
+        self.columns = columns
+        self._mapping = self
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, column: ColumnElement[Any]) -> Any:
+        return self.columns[column.name]
+
+
+class FakeResult:
+    """Result holding at most one row."""
+
+    def __init__(self, row: FakeRow | None) -> None:
+        self.row = row
+
+    def first(self) -> FakeRow | None:
+        return self.row
+
+    def scalar_one_or_none(self) -> Any:
+        return None if self.row is None else next(iter(self.row.columns.values()))
+
+
+class FakeSession:
+    """Session that records statements and commits, returning queued rows."""
+
+    def __init__(self, *rows: FakeRow | None) -> None:
+        self.rows = list(rows)
+        self.statements: list[Executable] = []
+        self.commits = 0
+
+    @property
+    @contextmanager
+    def no_autoflush(self) -> Iterator[None]:
+        yield
+
+    async def execute(self, statement: Executable) -> FakeResult:
+        self.statements.append(statement)
+        return FakeResult(self.rows.pop(0))
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    def sql(self, i: int) -> str:
+        """SQL of the i-th executed statement, as sent to PostgreSQL."""
+        return str(self.statements[i].compile(dialect=postgresql.dialect()))
+
+    def params(self, i: int) -> dict[str, Any]:
+        """Bound parameters of the i-th executed statement."""
+        return self.statements[i].compile(dialect=postgresql.dialect()).params
+
+
+def _service(session: FakeSession) -> UserManagementService:
+    return UserManagementService(session)  # type: ignore[arg-type]
+
+
+class TestUpdateUser:
+    """Test updating user profile fields."""
+
+    async def test_user_not_found(self) -> None:
+        """Test a missing user returns None without committing."""
+        session = FakeSession(None, None)
+        assert await _service(session).update_user(1, email="new@example.com") is None
+        assert session.commits == 0
+
+    async def test_no_op_save_does_not_commit(self) -> None:
+        """Test unchanged values leave the row and updated_at alone."""
+        session = FakeSession(None, FakeRow(updated_at=UPDATED_AT))
+        result = await _service(session).update_user(1, email="same@example.com")
+        assert result == {"user_id": 1, "changes": {}, "updated_at": UPDATED_AT.isoformat()}
+        assert session.commits == 0
+        # The update only matches when a field differs, and the fallback only reads
+        assert "IS DISTINCT FROM" in session.sql(0)
+        assert session.sql(1).startswith("SELECT users.updated_at")
+
+    async def test_no_fields_only_reads(self) -> None:
+        """Test a call without fields issues no update."""
+        session = FakeSession(FakeRow(updated_at=UPDATED_AT))
+        result = await _service(session).update_user(1)
+        assert result == {"user_id": 1, "changes": {}, "updated_at": UPDATED_AT.isoformat()}
+        assert len(session.statements) == 1
+        assert session.sql(0).startswith("SELECT users.updated_at")
+
+    async def test_change_is_written_and_reported(self) -> None:
+        """Test a real change commits once and reports old and new values."""
+        session = FakeSession(
+            FakeRow(updated_at=UPDATED_AT, email="old@example.com", usage_quota=10)
+        )
+        result = await _service(session).update_user(1, email="new@example.com", usage_quota=10)
+        assert result == {
+            "user_id": 1,
+            "changes": {"email": {"old": "old@example.com", "new": "new@example.com"}},
+            "updated_at": UPDATED_AT.isoformat(),
+        }
+        assert session.commits == 1
+        assert len(session.statements) == 1
+
+        sql = session.sql(0)
+        assert sql.startswith("UPDATE users SET email=")
+        assert "FOR UPDATE" in sql
+        assert "users.email IS DISTINCT FROM" in sql
+        assert "users.usage_quota IS DISTINCT FROM" in sql
+        assert sql.endswith('RETURNING users.updated_at, "old".email, "old".usage_quota')
+        assert "new@example.com" in session.params(0).values()
+
+
+class TestSuspendUser:
+    """Test suspending user accounts."""
+
+    async def test_user_not_found(self) -> None:
+        """Test a missing user returns None without committing."""
+        session = FakeSession(None)
+        assert await _service(session).suspend_user(1, "spam") is None
+        assert session.commits == 0
+
+    @pytest.mark.parametrize("was_active", [True, False])
+    async def test_reports_previous_state(self, was_active: bool) -> None:
+        """Test was_active comes from the row before the update."""
+        session = FakeSession(FakeRow(is_active=was_active))
+        result = await _service(session).suspend_user(1, "spam")
+        assert result == {
+            "user_id": 1,
+            "was_active": was_active,
+            "is_active": False,
+            "reason": "spam",
+        }
+        assert session.commits == 1
+
+    async def test_records_suspension_metadata(self) -> None:
+        """Test the reason and timestamp are merged into preferences."""
+        session = FakeSession(FakeRow(is_active=True))
+        await _service(session).suspend_user(1, "spam")
+
+        sql = session.sql(0)
+        assert sql.startswith("UPDATE users SET is_active=")
+        assert "FOR UPDATE" in sql
+        assert "|| jsonb_build_object(" in sql
+        assert sql.endswith('RETURNING "old".is_active')
+        params = session.params(0)
+        assert params["is_active"] is False
+        assert all(
+            value in params.values() for value in ("suspension_reason", "spam", "suspended_at")
+        )
+
+
+class TestUnsuspendUser:
+    """Test lifting user suspensions."""
+
+    async def test_user_not_found(self) -> None:
+        """Test a missing user returns None without committing."""
+        session = FakeSession(None)
+        assert await _service(session).unsuspend_user(1) is None
+        assert session.commits == 0
+
+    async def test_reactivates_and_clears_suspension_metadata(self) -> None:
+        """Test the account is reactivated and both suspension keys are removed."""
+        session = FakeSession(FakeRow(id=1))
+        assert await _service(session).unsuspend_user(1) == {"user_id": 1, "is_active": True}
+        assert session.commits == 1
+
+        sql = session.sql(0)
+        assert sql.startswith("UPDATE users SET is_active=")
+        assert sql.count(" - ") == 2
+        assert sql.endswith("RETURNING users.id")
+        params = session.params(0)
+        assert params["is_active"] is True
+        assert all(value in params.values() for value in ("suspension_reason", "suspended_at"))
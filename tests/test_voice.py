@@ -0,0 +1,261 @@
+"""Tests for voice synthesis helpers."""
+
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+
+from codestory.tools import voice
+
+
+def _id3_tag(body: bytes, footer: bool = False) -> bytes:
+    """Build an ID3v2 tag with a syncsafe size header around body."""
+    size = len(body)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    flags = b"\x10" if footer else b"\x00"
+    trailer = b"3DI" + b"\x00" * 7 if footer else b""
+    return b"ID3\x04\x00" + flags + syncsafe + body + trailer
+
+
+class TestSplitSegment:
+    """Test splitting of over-long narration segments."""
+
+    @pytest.fixture(autouse=True)
+    def small_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(voice, "_MAX_REQUEST_CHARS", 20)
+
+    def test_short_segment_is_unchanged(self) -> None:
+        """Test a segment within the limit is returned as-is."""
+        assert voice._split_segment("Short enough.") == ["Short enough."]
+
+    def test_splits_at_sentence_boundaries(self) -> None:
+        """Test pieces end at the last sentence boundary that fits."""
+        pieces = voice._split_segment("One two. Three four. Five six seven.")
+        assert pieces == ["One two. Three four.", "Five six seven."]
+
+    def test_falls_back_to_whitespace(self) -> None:
+        """Test a long sentence is split between words."""
+        pieces = voice._split_segment("alpha beta gamma delta epsilon zeta")
+        assert pieces == ["alpha beta gamma", "delta epsilon zeta"]
+
+    def test_hard_splits_a_single_long_word(self) -> None:
+        """Test a word longer than the limit is cut at the limit."""
+        assert voice._split_segment("x" * 45) == ["x" * 20, "x" * 20, "x" * 5]
+
+    def test_pieces_fit_the_limit_and_keep_the_words(self) -> None:
+        """Test every piece fits and no words are lost."""
+        text = "Lorem ipsum dolor sit amet! Consectetur adipiscing? Elit sed do eiusmod."
+        pieces = voice._split_segment(text)
+        assert all(len(piece) <= 20 for piece in pieces)
+        assert " ".join(pieces).split() == text.split()
+
+
+class TestPackSegments:
+    """Test packing of narration segments into requests."""
+
+    @pytest.fixture(autouse=True)
+    def small_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(voice, "_MAX_REQUEST_CHARS", 10)
+
+    def test_packs_adjacent_segments_up_to_the_limit(self) -> None:
+        """Test segments are grouped while they fit, counting the separator."""
+        segments = ["aaa", "bbb", "ccc", "dddd"]
+        batches = voice._pack_segments(segments, [len(s) for s in segments])
+        # "aaa\n\nbbb" is 8 characters; adding "\n\nccc" would make 13
+        assert batches == [["aaa", "bbb"], ["ccc", "dddd"]]
+
+    def test_segment_at_the_limit_gets_its_own_batch(self) -> None:
+        """Test a segment exactly at the limit is not merged."""
+        segments = ["a", "b" * 10, "c"]
+        batches = voice._pack_segments(segments, [len(s) for s in segments])
+        assert batches == [["a"], ["b" * 10], ["c"]]
+
+    def test_keeps_script_order(self) -> None:
+        """Test joining the batches reproduces the segment order."""
+        segments = [str(i) for i in range(20)]
+        batches = voice._pack_segments(segments, [len(s) for s in segments])
+        assert [s for batch in batches for s in batch] == segments
+        assert all(len(voice._SEGMENT_SEPARATOR.join(b)) <= 10 for b in batches)
+
+    def test_empty_input(self) -> None:
+        """Test no segments produce no batches."""
+        assert voice._pack_segments([], []) == []
+
+
+class TestStripId3:
+    """Test ID3v2 tag removal."""
+
+    def test_untagged_chunk_is_unchanged(self) -> None:
+        """Test chunks without a tag are returned whole."""
+        assert bytes(voice._strip_id3(b"\xff\xfbframes")) == b"\xff\xfbframes"
+
+    def test_strips_tag(self) -> None:
+        """Test the tag header and body are dropped."""
+        chunk = _id3_tag(b"TIT2data") + b"\xff\xfbframes"
+        assert bytes(voice._strip_id3(chunk)) == b"\xff\xfbframes"
+
+    def test_strips_tag_with_footer(self) -> None:
+        """Test a tag footer is dropped too."""
+        chunk = _id3_tag(b"TIT2data", footer=True) + b"\xff\xfbframes"
+        assert bytes(voice._strip_id3(chunk)) == b"\xff\xfbframes"
+
+    def test_large_syncsafe_size(self) -> None:
+        """Test sizes spanning several syncsafe bytes are decoded."""
+        chunk = _id3_tag(b"\x00" * 70000) + b"\xff\xfb"
+        assert bytes(voice._strip_id3(chunk)) == b"\xff\xfb"
+
+
+class TestWriteMp3:
+    """Test joining MP3 chunks into one file."""
+
+    def test_keeps_only_the_first_tag(self, tmp_path: Path) -> None:
+        """Test later chunks lose their tags and everything is written in order."""
+        first = _id3_tag(b"first") + b"AAA"
+        chunks = [first, _id3_tag(b"second") + b"BBB", b"CCC"]
+        out = tmp_path / "out.mp3"
+        voice._write_mp3(str(out), chunks)
+        assert out.read_bytes() == first + b"BBBCCC"
+
+    def test_more_chunks_than_one_writev_call(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test chunks beyond the per-call buffer limit are still written."""
+        monkeypatch.setattr(voice, "_WRITEV_MAX_BUFFERS", 3)
+        chunks = [bytes([i]) * (i + 1) for i in range(10)]
+        out = tmp_path / "out.mp3"
+        voice._write_mp3(str(out), chunks)
+        assert out.read_bytes() == b"".join(chunks)
+
+
+class TestSaveSegment:
+    """Test saving segment audio when no output path is given."""
+
+    @pytest.fixture(autouse=True)
+    def segment_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        monkeypatch.setattr(voice, "SEGMENT_DIR", str(tmp_path / "segments"))
+        monkeypatch.setattr(voice, "SEGMENT_KEEP", 2)
+        return tmp_path / "segments"
+
+    def test_repeated_audio_shares_a_file(self) -> None:
+        """Test identical audio is saved once under the same name."""
+        first = voice._save_segment(b"audio")
+        assert voice._save_segment(b"audio") == first
+        assert Path(first).read_bytes() == b"audio"
+
+    def test_keeps_only_the_newest_segments(self, segment_dir: Path) -> None:
+        """Test older segments are pruned beyond SEGMENT_KEEP."""
+        paths = []
+        for i in range(3):
+            paths.append(voice._save_segment(bytes([i])))
+            os.utime(paths[-1], (i, i))
+        assert sorted(segment_dir.iterdir()) == sorted(map(Path, paths[1:]))
+
+
+class TestPlanRequests:
+    """Test how narration segments map onto requests and cached audio."""
+
+    def test_packs_all_segments_by_default(self) -> None:
+        """Test the first and last segments share requests with the rest."""
+        segments = ["intro", "a", "b", "outro"]
+        batches, plan = voice._plan_requests(
+            segments, [len(s) for s in segments], [None] * len(segments)
+        )
+        assert batches == [["intro", "a", "b", "outro"]]
+        assert plan == [0]
+
+    def test_intro_and_outro_are_requested_alone_when_asked(self) -> None:
+        """Test standalone_ends gives the first and last segments their own requests."""
+        segments = ["intro", "a", "b", "outro"]
+        batches, plan = voice._plan_requests(
+            segments, [len(s) for s in segments], [None] * len(segments), standalone_ends=True
+        )
+        assert batches == [["intro"], ["a", "b"], ["outro"]]
+        assert plan == [0, 1, 2]
+
+    def test_cached_segments_are_not_requested(self) -> None:
+        """Test cached audio is used in place and splits packing runs."""
+        segments = ["intro", "a", "b", "c", "outro"]
+        cached: list[bytes | None] = [b"INTRO", None, b"B", None, b"OUTRO"]
+        batches, plan = voice._plan_requests(segments, [len(s) for s in segments], cached)
+        assert batches == [["a"], ["c"]]
+        assert plan == [b"INTRO", 0, b"B", 1, b"OUTRO"]
+
+
+class TestTtsCache:
+    """Test the byte-bounded synthesized audio cache."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(voice, "_TTS_CACHE", voice.OrderedDict())
+        monkeypatch.setattr(voice, "_tts_cache_bytes", 0)
+        monkeypatch.setattr(voice, "_TTS_CACHE_BYTES", 10)
+
+    def test_evicts_least_recently_used_beyond_the_byte_limit(self) -> None:
+        """Test total cached bytes stay within the limit."""
+        voice._cache_put(b"a", b"1234")
+        voice._cache_put(b"b", b"1234")
+        assert voice._cache_get(b"a") == b"1234"
+        voice._cache_put(b"c", b"1234")
+        assert list(voice._TTS_CACHE) == [b"a", b"c"]
+        assert voice._tts_cache_bytes == 8
+
+    def test_skips_entries_larger_than_the_limit(self) -> None:
+        """Test oversized audio is not cached and does not flush the cache."""
+        voice._cache_put(b"a", b"1234")
+        voice._cache_put(b"big", b"x" * 11)
+        assert list(voice._TTS_CACHE) == [b"a"]
+
+
+class TestApiError:
+    """Test tool error results for ElevenLabs HTTP errors."""
+
+    @pytest.mark.parametrize("status_code", [429, 418])
+    def test_result_is_a_mutable_copy(self, status_code: int) -> None:
+        """Test modifying a result does not leak into later results."""
+        result = voice._api_error(status_code)
+        assert result == {
+            "content": [{"type": "text", "text": f"ElevenLabs API error: {status_code}"}],
+            "isError": True,
+        }
+        result["content"][0]["text"] = "changed"
+        result["content"].append({"type": "text", "text": "extra"})
+        assert voice._api_error(status_code)["content"] == [
+            {"type": "text", "text": f"ElevenLabs API error: {status_code}"}
+        ]
+
+
+class TestFailureMessage:
+    """Test descriptions of failed narration requests."""
+
+    def test_http_status_error(self) -> None:
+        """Test HTTP errors are reported by status code."""
+        request = httpx.Request("POST", voice.ELEVENLABS_API_URL)
+        response = httpx.Response(500, request=request)
+        error = httpx.HTTPStatusError("boom", request=request, response=response)
+        assert voice._failure_message(error) == "ElevenLabs API error: 500"
+
+    def test_other_errors(self) -> None:
+        """Test other errors use their message, or their type without one."""
+        assert voice._failure_message(ValueError("bad text")) == "bad text"
+        assert voice._failure_message(httpx.ReadTimeout("")) == "ReadTimeout"
+
+
+class TestRetryDelay:
+    """Test backoff delays between ElevenLabs retries."""
+
+    @pytest.mark.parametrize(
+        ("retry_after", "expected"),
+        [("30", 30.0), ("600", voice._RETRY_AFTER_MAX), ("-5", 0.0)],
+    )
+    def test_honours_retry_after_seconds(self, retry_after: str, expected: float) -> None:
+        """Test Retry-After seconds are used, clamped to [0, _RETRY_AFTER_MAX]."""
+        response = httpx.Response(429, headers={"Retry-After": retry_after})
+        assert voice._retry_delay(response, 0) == expected
+
+    def test_jittered_backoff_without_retry_after(self) -> None:
+        """Test the fallback delay stays under the exponential cap."""
+        response = httpx.Response(503)
+        for attempt in range(3):
+            delay = voice._retry_delay(response, attempt)
+            assert 0 <= delay <= voice._RETRY_BASE_DELAY * 2**attempt